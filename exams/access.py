@@ -0,0 +1,127 @@
+"""
+Maintenance of the materialized ExamAccess table.
+
+A student may take an exam of their grade written by one of their teachers.
+Instead of re-deriving that join on every request, ExamAccess stores one row
+per (student, exam) pair and the signals below keep it current when a
+student's teachers or grade change, or when an exam's grade, teacher or
+timing does.
+
+Changes that bypass signals (QuerySet.update(), bulk_create() of exams, raw
+SQL) must be followed by rebuild_student_access()/rebuild_exam_access() or
+the rebuild_exam_access command.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Student, Teacher, Exam, ExamAccess
+
+BATCH_SIZE = 1000
+# The Exam fields its access rows are derived from.
+ACCESS_FIELDS = ('grade', 'teacher', 'is_timed', 'start_datetime', 'end_datetime')
+
+
+def access_pairs(students):
+    """
+    Return the (student id, exam id, opens_at, closes_at) rows the given
+    Student queryset should have, computed in a single query.
+    """
+    return (students.filter(teachers__exam__grade=F('grade'))
+            .order_by('id', 'teachers__exam__id')
+            .values_list('id', 'teachers__exam__id', 'teachers__exam__is_timed',
+                         'teachers__exam__start_datetime', 'teachers__exam__end_datetime'))
+
+
+def access_row(student_id, exam_id, is_timed, start, end):
+    if not is_timed:
+        start = end = None
+    return ExamAccess(student_id=student_id, exam_id=exam_id, opens_at=start, closes_at=end)
+
+
+def expected_access(students=None):
+    """Yield the ExamAccess rows that should exist for ``students`` (default: everyone)."""
+    students = Student.objects.all() if students is None else students
+    for pair in access_pairs(students).iterator(chunk_size=BATCH_SIZE):
+        yield access_row(*pair)
+
+
+def rebuild_student_access(student_ids):
+    student_ids = list(student_ids)
+    with transaction.atomic():
+        ExamAccess.objects.filter(student_id__in=student_ids).delete()
+        ExamAccess.objects.bulk_create(expected_access(Student.objects.filter(id__in=student_ids)),
+                                       batch_size=BATCH_SIZE)
+
+
+def rebuild_exam_access(exam):
+    with transaction.atomic():
+        ExamAccess.objects.filter(exam=exam).delete()
+        if exam.teacher_id is None:
+            return
+        students = Student.objects.filter(grade=exam.grade, teachers=exam.teacher_id).values_list('id', flat=True)
+        ExamAccess.objects.bulk_create(
+            [access_row(student_id, exam.id, exam.is_timed, exam.start_datetime, exam.end_datetime)
+             for student_id in students.iterator(chunk_size=BATCH_SIZE)],
+            batch_size=BATCH_SIZE,
+        )
+
+
+def rebuild_all_access():
+    """Recreate the whole table; returns the number of rows written."""
+    written = 0
+    with transaction.atomic():
+        ExamAccess.objects.all().delete()
+        batch = []
+        for row in expected_access():
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                written += len(ExamAccess.objects.bulk_create(batch))
+                batch = []
+        written += len(ExamAccess.objects.bulk_create(batch))
+    return written
+
+
+@receiver(m2m_changed, sender=Student.teachers.through)
+def student_teachers_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        rebuild_student_access([instance.pk])
+    elif action == 'post_clear':
+        # No student has this teacher any more.
+        ExamAccess.objects.filter(exam__teacher=instance).delete()
+    else:
+        rebuild_student_access(pk_set)
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rebuild_student_access([instance.pk])
+
+
+@receiver(pre_save, sender=Exam)
+def exam_saving(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Most saves (e.g. of the title or instructions) leave the access rows as they are.
+    if raw or (update_fields is not None and not update_fields & set(ACCESS_FIELDS)):
+        instance._access_changed = False
+    elif instance._state.adding:
+        instance._access_changed = True
+    else:
+        stored = Exam.objects.filter(pk=instance.pk).values_list(*ACCESS_FIELDS).first()
+        instance._access_changed = stored != tuple(getattr(instance, Exam._meta.get_field(field).attname)
+                                                   for field in ACCESS_FIELDS)
+
+
+@receiver(post_save, sender=Exam)
+def exam_saved(sender, instance, raw=False, **kwargs):
+    if not raw and getattr(instance, '_access_changed', True):
+        rebuild_exam_access(instance)
+
+
+@receiver(pre_delete, sender=Teacher)
+def teacher_deleted(sender, instance, **kwargs):
+    # Exam.teacher is SET_NULL through an UPDATE, which sends no post_save.
+    ExamAccess.objects.filter(exam__teacher=instance).delete()
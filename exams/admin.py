@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User
-from .models import Student, Teacher
+from .models import Student, Teacher, ApiToken, ExamAttempt
 from django.shortcuts import redirect, get_object_or_404
 from django.contrib import messages
 
@@ -27,6 +27,9 @@ class StudentAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__email')
     inlines = [TeacherInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user').prefetch_related('teachers__user')
+
     def get_teachers(self, obj):
         return ", ".join([teacher.user.username for teacher in obj.teachers.all()])
 
@@ -40,8 +43,29 @@ class StudentAdmin(admin.ModelAdmin):
     get_email.short_description = 'Email'
 
 
+class ApiTokenAdmin(admin.ModelAdmin):
+    # Keys are only shown when issued: use /api/tokens/ or `manage.py issue_api_token`.
+    list_display = ('user', 'name', 'prefix', 'created_at', 'expires_at', 'revoked_at')
+    list_select_related = ('user',)
+    search_fields = ('user__username', 'name', 'prefix')
+    readonly_fields = ('user', 'prefix', 'digest', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+class ExamAttemptAdmin(admin.ModelAdmin):
+    list_display = ('student', 'exam', 'status', 'started_at', 'submitted_at')
+    list_filter = ('status',)
+    list_select_related = ('student__user', 'exam')
+    search_fields = ('student__user__username', 'exam__title')
+    raw_id_fields = ('student', 'exam', 'result')
+
+
 admin.site.register(Student, StudentAdmin)
 admin.site.register(Teacher)
+admin.site.register(ApiToken, ApiTokenAdmin)
+admin.site.register(ExamAttempt, ExamAttemptAdmin)
 
 
 
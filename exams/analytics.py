@@ -0,0 +1,166 @@
+"""
+Score and item statistics of an exam.
+
+All submissions are read with one query into a student x question matrix
+of scores (NaN where an answer is missing or not graded yet), and every
+statistic is computed on that matrix with NumPy:
+
+- the distribution of the students' total scores;
+- per question, difficulty (the p-value: mean share of the points earned),
+  discrimination (point-biserial correlation of the item with the rest of
+  the test) and how often each answer choice was picked;
+- Cronbach's alpha over the students who have a score for every question.
+
+Results are cached per exam until its questions or answers change (see
+caching.answers_version()).
+"""
+import numpy as np
+from django.core.cache import cache
+
+from .caching import CACHE_TIMEOUT, answers_version, exam_questions, exam_version
+from .models import StudentAnswer
+from .scoring import AnswerKey
+
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 10
+
+
+def analytics_key(exam_id, version, answers):
+    return f'exam:{exam_id}:v{version}:a{answers}:analytics'
+
+
+def rounded(value, digits=4):
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def response_matrix(exam, questions):
+    """
+    Return (student ids, score matrix, question column of each answer,
+    answer texts) from one query over the exam's answers.
+    """
+    rows = list(StudentAnswer.objects.filter(question__exam_id=exam.id)
+                .values_list('student_id', 'question_id', 'answer', 'score'))
+    question_ids = np.array([question.id for question in questions], dtype=np.int64)
+    if not rows or not len(question_ids):
+        return np.empty(0, dtype=np.int64), np.empty((0, len(question_ids))), np.empty(0, dtype=np.int64), []
+
+    student_column, question_column, answers, scores = zip(*rows)
+    student_ids, student_index = np.unique(np.array(student_column, dtype=np.int64), return_inverse=True)
+    order = np.argsort(question_ids)
+    position = np.searchsorted(question_ids, np.array(question_column, dtype=np.int64), sorter=order)
+    columns = order[np.minimum(position, len(order) - 1)]
+
+    matrix = np.full((len(student_ids), len(question_ids)), np.nan)
+    matrix[student_index, columns] = np.array(scores, dtype=float)  # None becomes NaN.
+    return student_ids, matrix, columns, answers
+
+
+def score_distribution(totals, max_score):
+    if not len(totals):
+        return {'count': 0}
+    upper = max(max_score, totals.max(), 1)
+    counts, edges = np.histogram(totals, bins=HISTOGRAM_BINS, range=(0, upper))
+    return {
+        'count': int(len(totals)),
+        'mean': rounded(totals.mean()),
+        'median': rounded(np.median(totals)),
+        'std': rounded(totals.std(ddof=1)) if len(totals) > 1 else None,
+        'min': rounded(totals.min()),
+        'max': rounded(totals.max()),
+        'percentiles': {str(p): rounded(v) for p, v in zip(PERCENTILES, np.percentile(totals, PERCENTILES))},
+        'histogram': [{'from': rounded(edges[i], 2), 'to': rounded(edges[i + 1], 2), 'count': int(counts[i])}
+                      for i in range(len(counts))],
+    }
+
+
+def item_statistics(matrix, points):
+    """Difficulty and corrected point-biserial discrimination of every column."""
+    graded = ~np.isnan(matrix)
+    scores = np.where(graded, matrix, 0.0)
+    counts = graded.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        item_mean = scores.sum(axis=0) / counts
+        rest = scores.sum(axis=1, keepdims=True) - scores  # Total without the item itself.
+        rest_mean = (rest * graded).sum(axis=0) / counts
+        item_dev = np.where(graded, scores - item_mean, 0.0)
+        rest_dev = np.where(graded, rest - rest_mean, 0.0)
+        covariance = (item_dev * rest_dev).sum(axis=0)
+        correlation = covariance / np.sqrt((item_dev ** 2).sum(axis=0) * (rest_dev ** 2).sum(axis=0))
+    return counts, item_mean / points, correlation
+
+
+def cronbach_alpha(matrix):
+    complete = matrix[~np.isnan(matrix).any(axis=1)]
+    students, items = complete.shape
+    if students < 2 or items < 2:
+        return None
+    total_variance = complete.sum(axis=1).var(ddof=1)
+    if not total_variance:
+        return None
+    return rounded(items / (items - 1) * (1 - complete.var(axis=0, ddof=1).sum() / total_variance))
+
+
+def choice_frequencies(key, questions, columns, answers):
+    """
+    Count the answers given to each question per choice. Answers are
+    matched to choices once per distinct (question, answer) pair.
+    """
+    frequencies = [[0] * len(key.entries[question.id][0]) for question in questions]
+    other = np.zeros(len(questions), dtype=np.int64)
+    if not len(columns):
+        return frequencies, other
+    texts, text_index = np.unique(np.array(answers, dtype=object), return_inverse=True)
+    pairs, counts = np.unique(columns * len(texts) + text_index, return_counts=True)
+    for pair, count in zip(pairs.tolist(), counts.tolist()):
+        column, text = divmod(pair, len(texts))
+        choices = key.entries[questions[column].id][0]
+        index = key.resolve(key.normalize(texts[text]), choices)
+        if index is None:
+            other[column] += count
+        else:
+            frequencies[column][index] += count
+    return frequencies, other
+
+
+def compute_analytics(exam):
+    questions = exam_questions(exam, with_key=True)
+    key = AnswerKey(questions)
+    student_ids, matrix, columns, answers = response_matrix(exam, questions)
+    totals = np.nansum(matrix, axis=1)
+    points = np.array([key.points[question.id] for question in questions])
+    counts, difficulty, discrimination = item_statistics(matrix, points)
+    frequencies, other = choice_frequencies(key, questions, columns, answers)
+
+    items = []
+    for column, question in enumerate(questions):
+        correct_index = key.entries[question.id][1]
+        labels = question.answer_choices if isinstance(question.answer_choices, list) else []
+        items.append({
+            'question': question.id,
+            'question_text': question.question_text,
+            'graded': int(counts[column]),
+            'difficulty': rounded(difficulty[column]),
+            'discrimination': rounded(discrimination[column]),
+            'choices': [{'choice': label, 'count': frequencies[column][index], 'correct': index == correct_index}
+                        for index, label in enumerate(labels)],
+            'other_answers': int(other[column]),
+        })
+    return {
+        'exam': exam.id,
+        'submissions': int(len(student_ids)),
+        'max_score': key.max_score,
+        'scores': score_distribution(totals, key.max_score),
+        'cronbach_alpha': cronbach_alpha(matrix),
+        'questions': items,
+    }
+
+
+def exam_analytics(exam):
+    """Statistics of ``exam``, from the cache while its questions and answers are unchanged."""
+    key = analytics_key(exam.id, exam_version(exam), answers_version(exam))
+    result = cache.get(key)
+    if result is None:
+        result = compute_analytics(exam)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
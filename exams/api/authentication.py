@@ -0,0 +1,31 @@
+from rest_framework import authentication, exceptions
+
+from ..tokens import token_user
+
+
+class HashedTokenAuthentication(authentication.BaseAuthentication):
+    """
+    `Authorization: Token <key>` with keys issued by exams.tokens. Meant for
+    scripts: unlike BasicAuthentication, it does not hash a password on
+    every request.
+    """
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = authentication.get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header. Use "Token <key>".')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header. The key contains invalid characters.')
+
+        user = token_user(key)
+        if user is None:
+            raise exceptions.AuthenticationFailed('Invalid, expired or revoked token.')
+        return user, key
+
+    def authenticate_header(self, request):
+        return self.keyword
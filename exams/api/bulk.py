@@ -0,0 +1,183 @@
+"""
+List-payload bulk writes for the API viewsets.
+
+BulkWriteMixin adds /bulk/ to a viewset:
+
+    POST  [{...}, {...}]                   create every object
+    PATCH [{"id": 1, ...}, {"id": 2, ...}] partially update every object
+
+The payload is validated as a whole before anything is written: related
+objects are fetched with one query per relation and the targets of an
+update with one query. If any item is invalid nothing is written, and the
+400 response holds one error dict per item, empty for valid ones. Valid
+payloads are written with bulk_create()/bulk_update() in one transaction.
+Bulk writes are for teachers, limited to their own exams and students, and
+superusers.
+"""
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
+
+from ..changes import TRACKED_MODELS, stamp
+
+BULK_MAX_ITEMS = 500
+
+
+def to_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def duplicate_errors(rows, model, fields, message):
+    """
+    {index: errors} for rows whose ``fields`` values repeat an earlier row
+    or an existing ``model`` object, checked with one query.
+    """
+    keys = [tuple(row[name].pk for name in fields) for row in rows]
+    existing = model.objects.filter(**{f'{name}__in': {key[i] for key in keys} for i, name in enumerate(fields)})
+    taken = set(existing.values_list(*[f'{name}_id' for name in fields]))
+    errors = {}
+    for index, key in enumerate(keys):
+        if key in taken:
+            errors[index] = {'non_field_errors': [message]}
+        taken.add(key)
+    return errors
+
+
+class TeacherScopedRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary-key relation limited to what the requesting teacher owns
+    (``teacher_lookup`` from the related model to Teacher). Looks objects
+    up in context['preloaded'] when the bulk mixin has fetched them.
+    """
+
+    def __init__(self, teacher_lookup, **kwargs):
+        self.teacher_lookup = teacher_lookup
+        super().__init__(**kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.context['request'].user
+        if user.is_superuser:
+            return queryset
+        return queryset.filter(**{self.teacher_lookup: user.teacher})
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.field_name)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool) or to_pk(data) is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if to_pk(data) not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[to_pk(data)]
+
+
+class BulkWriteSerializer(serializers.ModelSerializer):
+    """Write serializer of a bulk endpoint; its relations are fixed once an object exists."""
+
+    def validate(self, attrs):
+        if self.instance is not None:
+            for name, field in self.fields.items():
+                if (isinstance(field, TeacherScopedRelatedField) and name in attrs
+                        and attrs[name].pk != getattr(self.instance, field.source + '_id')):
+                    raise serializers.ValidationError({name: ['Cannot be changed.']})
+        return attrs
+
+
+class BulkWriteMixin:
+    bulk_serializer_class = None
+
+    def bulk_written(self, instances, created):
+        """Hook run inside the transaction after a bulk write."""
+
+    def validate_bulk_create(self, rows):
+        """Hook for checks across items; returns {index: errors}."""
+        return {}
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        return self.bulk_serializer_class(*args, **kwargs)
+
+    def get_bulk_queryset(self):
+        """Objects a bulk update may change, loaded with what their validation reads."""
+        return self.get_queryset()
+
+    def preload(self, items, context):
+        """Fetch the related objects of all items, one query per relation."""
+        fields = self.bulk_serializer_class(context=context).fields
+        context['preloaded'] = {}
+        for name, field in fields.items():
+            if isinstance(field, TeacherScopedRelatedField):
+                pks = {to_pk(item.get(name)) for item in items if isinstance(item, dict)} - {None}
+                context['preloaded'][name] = field.get_queryset().in_bulk(pks)
+        return context
+
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk')
+    def bulk(self, request):
+        user = request.user
+        if not (user.is_superuser or hasattr(user, 'teacher')):
+            raise PermissionDenied('Bulk writes are only available to teachers.')
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list of objects.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({'detail': f'At most {BULK_MAX_ITEMS} objects per request.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        context = self.preload(items, self.get_serializer_context())
+        if request.method == 'POST':
+            return self.bulk_create(items, context)
+        return self.bulk_update(items, context)
+
+    def bulk_create(self, items, context):
+        serializer = self.get_bulk_serializer(data=items, many=True, context=context)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        rows = serializer.validated_data
+        errors = self.validate_bulk_create(rows)
+        if errors:
+            return Response([errors.get(index, {}) for index in range(len(rows))],
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        model = self.bulk_serializer_class.Meta.model
+        with transaction.atomic():
+            instances = model.objects.bulk_create([model(**row) for row in rows])
+            self.bulk_written(instances, created=True)
+        return Response(self.get_serializer(instances, many=True).data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, items, context):
+        ids = [to_pk(item.get('id')) if isinstance(item, dict) else None for item in items]
+        targets = self.get_bulk_queryset().in_bulk(set(ids) - {None})
+
+        errors, changes, fields = [], [], set()
+        for item, pk in zip(items, ids):
+            if pk is None or pk not in targets:
+                errors.append({'id': ['Not found.']})
+                continue
+            serializer = self.get_bulk_serializer(targets[pk], data=item, partial=True, context=context)
+            if serializer.is_valid():
+                errors.append({})
+                changes.append((targets[pk], serializer.validated_data))
+                fields.update(serializer.validated_data)
+            else:
+                errors.append(serializer.errors)
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        if len(changes) != len(set(ids)):
+            return Response({'detail': 'Each object may appear only once.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        for instance, data in changes:
+            for name, value in data.items():
+                setattr(instance, name, value)
+        instances = [instance for instance, data in changes]
+        with transaction.atomic():
+            if fields:
+                model = self.bulk_serializer_class.Meta.model
+                fields = stamp(instances, sorted(fields)) if model in TRACKED_MODELS else sorted(fields)
+                model.objects.bulk_update(instances, fields)
+            self.bulk_written(instances, created=False)
+        return Response(self.get_serializer(instances, many=True).data)
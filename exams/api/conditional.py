@@ -0,0 +1,78 @@
+"""
+Conditional GET and cached, gzip-compressed responses for exam reads,
+keyed by the exam's version stamps (see caching.py).
+"""
+import gzip
+import hashlib
+
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from ..caching import CACHE_TIMEOUT, answers_version, exam_version
+
+
+class ExamConditionalMixin:
+    """ExamViewSet mixin; call cached_exam_response() from a detail action."""
+
+    def response_variant(self, request):
+        staff = request.user.is_superuser or hasattr(request.user, 'teacher')
+        variant = '|'.join([self.action, 'staff' if staff else 'student', request.get_full_path(),
+                            request.accepted_media_type])
+        return hashlib.md5(variant.encode()).hexdigest()[:16]
+
+    def requested_exam_id(self):
+        try:
+            return int(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404
+
+    def accessible_exam(self, queryset=None):
+        """The requested exam from ``queryset`` (default: get_queryset()), stamps only."""
+        queryset = self.get_queryset() if queryset is None else queryset
+        exam = queryset.filter(pk=self.requested_exam_id()).only('id', 'updated_at', 'answers_changed_at').first()
+        if exam is None:
+            raise Http404
+        return exam
+
+    def conditional_response(self, request, etag, version, respond):
+        """304 when the client holds ``etag``, else ``respond()``; both carry the validators."""
+        last_modified = version // 10 ** 9
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified) or respond()
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        # Cached by the client only, and revalidated on every use.
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Accept', 'Accept-Encoding', 'Authorization', 'Cookie'])
+        return response
+
+    def cached_exam_response(self, request, build, with_answers=False):
+        """
+        Respond with ``build()``, the action's data, through the ETag check
+        and the response cache; ``with_answers`` also versions it by answers.
+        """
+        if request.accepted_renderer.format != 'json':
+            return Response(build())  # The browsable API renders per user and request.
+        exam = self.accessible_exam()
+        exam_id = exam.id
+        version = exam_version(exam)
+        if with_answers:
+            version = max(version, answers_version(exam))
+        variant = self.response_variant(request)
+
+        def respond():
+            key = f'exam:{exam_id}:v{version}:response:{variant}'
+            body = cache.get(key)
+            if body is None:
+                body = gzip.compress(request.accepted_renderer.render(build(), request.accepted_media_type,
+                                                                      self.get_renderer_context()))
+                cache.set(key, body, CACHE_TIMEOUT)
+            if 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', ''):
+                response = HttpResponse(body, content_type=request.accepted_media_type)
+                response['Content-Encoding'] = 'gzip'
+                return response
+            return HttpResponse(gzip.decompress(body), content_type=request.accepted_media_type)
+
+        return self.conditional_response(request, f'"exam-{exam_id}-{version}-{variant}"', version, respond)
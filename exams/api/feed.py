@@ -0,0 +1,113 @@
+"""
+Incremental change feeds: GET <collection>/changes/?since=<cursor>.
+
+Each response holds the rows created or updated after the cursor, in
+(updated_at, id) order, the ids of rows deleted after it (from the
+tombstones, see exams.changes), and the cursor to send next; `more` is
+true while either list was cut at ?limit=. Omitting `since` starts a full
+sync. Both lists are index range scans, so polling every few seconds is
+cheap.
+
+Rows changed in the last settings.CHANGE_FEED_SETTLE seconds are held
+back until a later poll: a row's updated_at is taken before its write waits
+for a lock and its transaction commits, so a row stamped earlier can become
+visible after a cursor has already passed its timestamp. The hold-back
+therefore exceeds the database's lock timeout (see
+project_exams/database.py), and transactions writing tracked rows must stay
+short; a longer one can still be skipped by clients that polled meanwhile.
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from ..changes import TOMBSTONE_RETENTION, visible_tombstones
+from .flat import flat_plan, plan_columns, serialize_rows
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 1000
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(updated, deleted):
+    """Cursor of the (timestamp, id) positions in the rows and in the tombstones."""
+    parts = []
+    for moment, pk in (updated, deleted):
+        parts += [(moment - EPOCH) // timedelta(microseconds=1), pk]
+    return base64.urlsafe_b64encode(':'.join(map(str, parts)).encode()).decode()
+
+
+def decode_cursor(value):
+    try:
+        parts = [int(part) for part in base64.urlsafe_b64decode(value.encode()).decode().split(':')]
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({'since': 'Invalid cursor.'})
+    if len(parts) != 4:
+        raise ValidationError({'since': 'Invalid cursor.'})
+    return tuple((EPOCH + timedelta(microseconds=parts[i]), parts[i + 1]) for i in (0, 2))
+
+
+def after(queryset, field, position):
+    moment, pk = position
+    return queryset.filter(Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}))
+
+
+class ChangeFeedMixin:
+    """Viewset mixin adding the changes/ action over get_queryset()."""
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        limit = max(limit, 1)
+        until = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SETTLE)
+
+        if 'since' in request.query_params:
+            updated, deleted = decode_cursor(request.query_params['since'])
+            if deleted[0] < timezone.now() - TOMBSTONE_RETENTION:
+                return Response({'detail': 'The cursor is older than the kept deletions; sync again without since.'},
+                                status=status.HTTP_410_GONE)
+        else:
+            # Deletions before a full sync do not concern the client.
+            updated, deleted = (EPOCH, 0), (until, 0)
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(updated_at__lte=until)
+        queryset = after(queryset, 'updated_at', updated).order_by('updated_at', 'id')[:limit]
+        plan = flat_plan(self.get_serializer())
+        if plan is None:
+            rows = list(queryset)
+            results = self.get_serializer(rows, many=True).data
+            positions = [(row.updated_at, row.id) for row in rows]
+        else:
+            rows = list(queryset.values(*plan_columns(plan, ('updated_at', 'id'))))
+            results = serialize_rows(plan, rows)
+            positions = [(row['updated_at'], row['id']) for row in rows]
+        if positions:
+            updated = positions[-1]
+
+        tombstones = visible_tombstones(request.user, self.get_queryset().model).filter(deleted_at__lte=until)
+        tombstones = list(after(tombstones, 'deleted_at', deleted).order_by('deleted_at', 'id')
+                          .values_list('deleted_at', 'id', 'object_id')[:limit])
+        if len(tombstones) == limit:
+            deleted = tombstones[-1][:2]
+        elif tombstones and tombstones[-1][0] == until:
+            deleted = (until, tombstones[-1][1])
+        else:
+            # Nothing else was deleted up to `until`: move on, so idle cursors do not expire.
+            deleted = (until, 0)
+
+        return Response({
+            'results': results,
+            'deleted': [object_id for deleted_at, pk, object_id in tombstones],
+            'next': encode_cursor(updated, deleted),
+            'more': len(rows) == limit or len(tombstones) == limit,
+        })
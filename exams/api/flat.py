@@ -0,0 +1,99 @@
+"""
+Fast read path for list endpoints.
+
+When every field a request asks for maps to a column of the model (no
+expanded relations, no many-to-many fields), FlatListMixin fetches the page
+with .values() and builds each item from a plan compiled once per request:
+(output name, column, converter) triples, where the converter is the
+serializer field's own to_representation() or nothing for types that are
+already JSON-ready. No model or serializer instances are created per row,
+and the output is the same as the serializer's. Other shapes fall back to
+the serializer.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# Fields whose to_representation() returns database values unchanged.
+PASSTHROUGH = (serializers.IntegerField, serializers.CharField, serializers.FloatField,
+               serializers.BooleanField, serializers.JSONField, serializers.ReadOnlyField)
+
+
+def datetime_converter(field):
+    """
+    DateTimeField.to_representation() with the output format and time zone
+    resolved once instead of per value.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or timezone.is_naive(value):
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def flat_plan(serializer):
+    """Return the [(name, column, converter)] plan of ``serializer``, or None if it is not flat."""
+    model = serializer.Meta.model
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField)):
+            return None
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None  # '*', dotted or computed sources
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            plan.append((name, model_field.attname, None))
+        elif isinstance(field, PASSTHROUGH) and not isinstance(field, serializers.ChoiceField):
+            plan.append((name, model_field.attname, None))
+        elif isinstance(field, serializers.DateTimeField):
+            plan.append((name, model_field.attname, datetime_converter(field)))
+        else:
+            plan.append((name, model_field.attname, field.to_representation))
+    return plan
+
+
+def plan_columns(plan, ordering=()):
+    """Columns to fetch for ``plan``, plus those the pagination orders by."""
+    columns = [column for name, column, convert in plan]
+    for field in ordering:
+        column = field.lstrip('-')
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def serialize_rows(plan, rows):
+    """Items of ``rows`` (dicts from .values()) in the serializer's output format."""
+    return [
+        {name: row[column] if convert is None or row[column] is None else convert(row[column])
+         for name, column, convert in plan}
+        for row in rows
+    ]
+
+
+class FlatListMixin:
+    """Viewset mixin serving list() through the fast path whenever the requested shape allows it."""
+
+    def list(self, request, *args, **kwargs):
+        plan = flat_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        ordering = getattr(self.paginator, 'ordering', ())
+        ordering = (ordering,) if isinstance(ordering, str) else ordering
+        queryset = self.filter_queryset(self.get_queryset()).values(*plan_columns(plan, ordering))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serialize_rows(plan, page))
+        return Response(serialize_rows(plan, queryset))
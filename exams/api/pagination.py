@@ -0,0 +1,43 @@
+import hashlib
+
+from django.core.cache import cache
+from rest_framework.pagination import CursorPagination
+
+COUNT_TIMEOUT = 60
+
+
+def cached_count(queryset, timeout=COUNT_TIMEOUT):
+    """COUNT(*) of ``queryset``, cached for ``timeout`` seconds per distinct SQL."""
+    sql = str(queryset.order_by().query)
+    key = 'api:count:' + hashlib.md5(sql.encode()).hexdigest()
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination on the primary key, newest first, for the large
+    collections: every page is an index range scan however deep it is.
+    Clients pick the page size with ?page_size= up to max_page_size. The
+    total is only computed with ?count=true, and cached briefly.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = cached_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return schema
@@ -0,0 +1,11 @@
+from rest_framework import permissions
+
+from .selection import is_staff
+
+
+class IsStaffOrReadOnly(permissions.IsAuthenticated):
+    """Reads for any signed-in user; writes for teachers and superusers only."""
+
+    def has_permission(self, request, view):
+        return (super().has_permission(request, view)
+                and (request.method in permissions.SAFE_METHODS or is_staff(request.user)))
@@ -0,0 +1,131 @@
+"""
+Client-selected response shapes for the API.
+
+Two query parameters pick what a response contains:
+
+    ?fields=id,answer,question.question_text   only these fields
+    ?expand=student,question.exam               embed these relations
+
+Relations are returned as primary keys unless expanded; naming a nested
+field in ``fields`` expands its relation too. Dotted paths reach into
+nested serializers. The viewsets build select_related()/prefetch_related()
+from the resulting serializer fields, so every shape costs a fixed number
+of queries per page.
+"""
+from rest_framework import serializers
+
+
+def parse_paths(value):
+    """Turn 'a,b.c,b.d' into {'a': {}, 'b': {'c': {}, 'd': {}}}."""
+    tree = {}
+    for path in (value or '').split(','):
+        node = tree
+        for name in path.strip().split('.'):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+def id_field(field):
+    """Primary-key field replacing the nested serializer ``field``."""
+    source = {'source': field.source} if field.source else {}  # Unbound fields only know a declared source.
+    if isinstance(field, serializers.ListSerializer):
+        return serializers.PrimaryKeyRelatedField(many=True, read_only=True, **source)
+    return serializers.PrimaryKeyRelatedField(read_only=True, **source)
+
+
+def is_staff(user):
+    return user is not None and (user.is_superuser or hasattr(user, 'teacher'))
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ModelSerializer honouring ``fields`` and ``expand``, given as keyword
+    arguments or read from the request's query parameters.
+
+    Fields listed in Meta.staff_only_fields are left out unless the
+    request's user is a superuser or a teacher, also when the serializer
+    is nested in another one or there is no request. Fields listed in
+    Meta.staff_writable_fields are read-only for the same users.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields, expand = kwargs.pop('fields', None), kwargs.pop('expand', None)
+        if fields is not None or expand is not None:
+            self.selection = (parse_paths(','.join(fields)) if fields is not None else None,
+                              parse_paths(','.join(expand or [])))
+        super().__init__(*args, **kwargs)
+
+    def get_selection(self):
+        """(field tree or None for all fields, expand tree) of this serializer."""
+        selection = getattr(self, 'selection', None)
+        if selection is not None:
+            return selection
+        request = self.context.get('request')
+        if request is None:
+            return None, {}
+        params = request.query_params
+        return (parse_paths(params['fields']) if 'fields' in params else None,
+                parse_paths(params.get('expand')))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if not is_staff(getattr(request, 'user', None)):
+            for name in getattr(self.Meta, 'staff_only_fields', ()):
+                fields.pop(name, None)
+            for name in getattr(self.Meta, 'staff_writable_fields', ()):
+                if name in fields:
+                    fields[name].read_only = True
+        only, expand = self.get_selection()
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        for name, field in list(fields.items()):
+            nested = field.child if isinstance(field, serializers.ListSerializer) else field
+            if not isinstance(nested, serializers.BaseSerializer):
+                continue
+            subfields = (only or {}).get(name) or None
+            if name not in expand and subfields is None:
+                fields[name] = id_field(field)
+            elif isinstance(nested, DynamicFieldsModelSerializer):
+                nested.selection = (subfields, expand.get(name, {}))
+        return fields
+
+
+def related_lookups(serializer, prefix='', prefetch=False):
+    """
+    Return (select_related, prefetch_related) lookups needed to render
+    ``serializer`` without further queries.
+    """
+    select, prefetches = [], []
+    fields = serializer.child.fields if isinstance(serializer, serializers.ListSerializer) else serializer.fields
+    for field in fields.values():
+        if field.source == '*' or '.' in field.source:
+            continue
+        lookup = prefix + field.source
+        if isinstance(field, serializers.ManyRelatedField):
+            prefetches.append(lookup)
+        elif isinstance(field, serializers.ListSerializer):
+            prefetches.append(lookup)
+            nested_select, nested_prefetch = related_lookups(field, lookup + '__', prefetch=True)
+            prefetches += nested_select + nested_prefetch
+        elif isinstance(field, serializers.BaseSerializer):
+            (prefetches if prefetch else select).append(lookup)
+            nested_select, nested_prefetch = related_lookups(field, lookup + '__', prefetch)
+            select += nested_select
+            prefetches += nested_prefetch
+    return select, prefetches
+
+
+class SelectRelatedMixin:
+    """Viewset mixin shaping the queryset after the serializer the request will use."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        select, prefetches = related_lookups(self.get_serializer())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
@@ -1,62 +1,162 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from ..models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger
+from ..models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger, ApiToken
+from ..models import ExamAttempt
+from ..scoring import question_points
+from .bulk import BulkWriteSerializer, TeacherScopedRelatedField
+from .selection import DynamicFieldsModelSerializer
 
-class UserSerializer(serializers.ModelSerializer):
+# Nested serializers are embedded only with ?expand= (see selection.py).
+
+class AnswerScoreMixin:
+    """Keeps answer scores within the points of their question (see scoring.py)."""
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        question = attrs.get('question') or getattr(self.instance, 'question', None)
+        if attrs.get('score') is not None and question is not None:
+            points = question_points(question)
+            if not 0 <= attrs['score'] <= points:
+                raise serializers.ValidationError({'score': [f'Ensure this value is between 0 and {points}.']})
+        return attrs
+
+class ResultTotalMixin:
+    """Keeps a result's total within its maximum."""
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        total = attrs.get('total_score', getattr(self.instance, 'total_score', 0))
+        max_score = attrs.get('max_score', getattr(self.instance, 'max_score', 0))
+        if not 0 <= total <= max_score:
+            raise serializers.ValidationError({'total_score': ['Must be between 0 and max_score.']})
+        return attrs
+
+class UserSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class StudentSerializer(serializers.ModelSerializer):
+class StudentSerializer(DynamicFieldsModelSerializer):
     user = UserSerializer(read_only=True)
     teachers = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
 
     class Meta:
         model = Student
-        fields = ['id', 'user', 'grade', 'teachers', 'created_at', 'updated_at']
+        fields = ['id', 'user', 'grade', 'teachers']
 
-class TeacherSerializer(serializers.ModelSerializer):
+class TeacherSerializer(DynamicFieldsModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
         model = Teacher
-        fields = ['id', 'user', 'created_at', 'updated_at']
+        fields = ['id', 'user']
 
-class ExamSerializer(serializers.ModelSerializer):
+class ExamSerializer(DynamicFieldsModelSerializer):
     teacher = TeacherSerializer(read_only=True)
     questions = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    average_score = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Exam
-        fields = ['id', 'title', 'subject', 'teacher', 'questions', 'created_at', 'updated_at']
+        fields = ['id', 'title', 'subject', 'description', 'instructions', 'teacher', 'grade', 'questions',
+                  'is_timed', 'start_datetime', 'end_datetime', 'duration_hours', 'duration_minutes', 'created_at',
+                  'updated_at', 'question_count', 'submission_count', 'graded_count', 'average_score']
+        read_only_fields = ['question_count', 'submission_count', 'graded_count']
 
-class QuestionSerializer(serializers.ModelSerializer):
+class QuestionSerializer(DynamicFieldsModelSerializer):
     exam = ExamSerializer(read_only=True)
 
     class Meta:
         model = Question
-        fields = ['id', 'exam', 'text', 'options', 'correct_answer', 'created_at', 'updated_at']
+        fields = ['id', 'exam', 'question_text', 'answer_choices', 'correct_answer']
+        staff_only_fields = ['correct_answer']  # The answer key
 
-class StudentAnswerSerializer(serializers.ModelSerializer):
+class StudentAnswerSerializer(AnswerScoreMixin, DynamicFieldsModelSerializer):
     student = StudentSerializer(read_only=True)
     question = QuestionSerializer(read_only=True)
 
     class Meta:
         model = StudentAnswer
-        fields = ['id', 'student', 'question', 'answer', 'created_at', 'updated_at']
+        fields = ['id', 'student', 'question', 'answer', 'score', 'created_at', 'updated_at']
+        staff_writable_fields = ['score']
 
-class ExamResultSerializer(serializers.ModelSerializer):
+class ExamResultSerializer(ResultTotalMixin, DynamicFieldsModelSerializer):
     student = StudentSerializer(read_only=True)
     exam = ExamSerializer(read_only=True)
 
     class Meta:
         model = ExamResult
-        fields = ['id', 'student', 'exam', 'total_score', 'created_at', 'updated_at']
+        fields = ['id', 'student', 'exam', 'total_score', 'max_score', 'percentage', 'completed_at', 'time_taken',
+                  'updated_at']
+        read_only_fields = ['percentage']  # Follows total_score and max_score
+        staff_writable_fields = ['total_score', 'max_score']
+
+class ExamAttemptSerializer(DynamicFieldsModelSerializer):
+    student = StudentSerializer(read_only=True)
+    exam = ExamSerializer(read_only=True)
+    result = ExamResultSerializer(read_only=True)
 
-class StudentLedgerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExamAttempt
+        fields = ['id', 'student', 'exam', 'status', 'started_at', 'submitted_at', 'result']
+
+class StudentLedgerSerializer(DynamicFieldsModelSerializer):
     student = StudentSerializer(read_only=True)
     exam = ExamSerializer(read_only=True)
 
     class Meta:
         model = StudentLedger
-        fields = ['id', 'student', 'exam', 'subject', 'date', 'score', 'teacher_name', 'created_at', 'updated_at']
+        fields = ['id', 'student', 'exam', 'subject', 'date', 'score', 'teacher_name', 'updated_at']
+
+# Payloads of the /bulk/ endpoints (see bulk.py). Uniqueness is checked per
+# payload by the viewsets instead of one query per item.
+
+class QuestionWriteSerializer(BulkWriteSerializer):
+    exam = TeacherScopedRelatedField('teacher', queryset=Exam.objects.all())
+
+    class Meta:
+        model = Question
+        fields = ['id', 'exam', 'question_text', 'answer_choices', 'correct_answer']
+
+class StudentAnswerWriteSerializer(AnswerScoreMixin, BulkWriteSerializer):
+    student = TeacherScopedRelatedField('teachers', queryset=Student.objects.all())
+    question = TeacherScopedRelatedField('exam__teacher', queryset=Question.objects.all())
+
+    class Meta:
+        model = StudentAnswer
+        fields = ['id', 'student', 'question', 'answer', 'score']
+        validators = []
+
+class ExamResultWriteSerializer(ResultTotalMixin, BulkWriteSerializer):
+    student = TeacherScopedRelatedField('teachers', queryset=Student.objects.all())
+    exam = TeacherScopedRelatedField('teacher', queryset=Exam.objects.all())
+
+    class Meta:
+        model = ExamResult
+        fields = ['id', 'student', 'exam', 'total_score', 'max_score', 'time_taken']
+
+class ApiTokenSerializer(serializers.ModelSerializer):
+    # Only present in the response that creates the token.
+    key = serializers.CharField(read_only=True)
+    expires_in_days = serializers.IntegerField(write_only=True, required=False, min_value=1)
+
+    class Meta:
+        model = ApiToken
+        fields = ['id', 'name', 'prefix', 'created_at', 'expires_at', 'revoked_at', 'expires_in_days', 'key']
+        read_only_fields = ['prefix', 'created_at', 'expires_at', 'revoked_at']
+
+class RosterSerializer(serializers.ModelSerializer):
+    """Student with the ledger summary annotated by exams.roster."""
+    username = serializers.CharField(source='user.username', read_only=True)
+    exam_count = serializers.IntegerField(read_only=True)
+    average_score = serializers.FloatField(read_only=True)
+    last_exam_date = serializers.DateTimeField(read_only=True)
+    subjects = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Student
+        fields = ['id', 'username', 'grade', 'exam_count', 'average_score', 'last_exam_date', 'subjects']
+
+    def get_subjects(self, student):
+        return [{'subject': subject, 'average_score': average, 'exam_count': exams}
+                for subject, average, exams in student.subjects]
@@ -10,7 +10,9 @@ router.register(r'exams', views.ExamViewSet)
 router.register(r'questions', views.QuestionViewSet)
 router.register(r'student-answers', views.StudentAnswerViewSet)
 router.register(r'exam-results', views.ExamResultViewSet)
+router.register(r'exam-attempts', views.ExamAttemptViewSet)
 router.register(r'student-ledger', views.StudentLedgerViewSet)
+router.register(r'tokens', views.ApiTokenViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
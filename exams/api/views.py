@@ -1,23 +1,55 @@
-from rest_framework import viewsets, permissions, status
+from collections import Counter
+from datetime import timedelta
+
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from ..models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from ..analytics import exam_analytics
+from ..bundles import exam_bundle
+from ..caching import exam_questions, invalidate_exam
+from ..changes import stamp
+from ..counters import bump, recount
+from ..grading import refresh_grades, save_totals
+from ..models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger, ApiToken
+from ..models import ExamAttempt, open_window_q
+from ..roster import annotate_roster, roster_ordering, subject_averages
+from ..scoring import AnswerKey, percentage
+from ..tokens import issue_token, revoke_token
+from .bulk import BulkWriteMixin, duplicate_errors
+from .conditional import ExamConditionalMixin
+from .feed import ChangeFeedMixin
+from .flat import FlatListMixin
+from .pagination import KeysetPagination
+from .permissions import IsStaffOrReadOnly
+from .selection import SelectRelatedMixin, is_staff
 from .serializers import (
     UserSerializer, StudentSerializer, TeacherSerializer,
     ExamSerializer, QuestionSerializer, StudentAnswerSerializer,
-    ExamResultSerializer, StudentLedgerSerializer
+    ExamResultSerializer, StudentLedgerSerializer, ExamAttemptSerializer,
+    QuestionWriteSerializer, StudentAnswerWriteSerializer, ExamResultWriteSerializer,
+    ApiTokenSerializer, RosterSerializer
 )
 
-class UserViewSet(viewsets.ModelViewSet):
+def exams_by_id(exam_ids):
+    return Exam.objects.select_related('teacher__user').in_bulk(exam_ids)
+
+def open_exams(user):
+    """Exams open to the student ``user`` now; timed exams only within their window."""
+    return Exam.objects.filter(open_window_q(prefix='access__'), access__student__user=user)
+
+class UserViewSet(SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class StudentViewSet(viewsets.ModelViewSet):
+class StudentViewSet(SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
@@ -27,47 +59,108 @@ class StudentViewSet(viewsets.ModelViewSet):
             return Student.objects.filter(teachers=user.teacher)
         return Student.objects.filter(user=user)
 
-class TeacherViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def roster(self, request):
+        """Students with their ledger summaries, paginated and sorted by ?sort= (see roster.py)."""
+        students = annotate_roster(self.get_queryset()).order_by(*roster_ordering(request.query_params.get('sort')))
+        page = self.paginate_queryset(students)
+        averages = subject_averages(page)
+        for student in page:
+            student.subjects = averages[student.id]
+        return self.get_paginated_response(RosterSerializer(page, many=True, context=self.get_serializer_context()).data)
+
+class TeacherViewSet(SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = Teacher.objects.all()
     serializer_class = TeacherSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class ExamViewSet(viewsets.ModelViewSet):
+class ExamViewSet(ExamConditionalMixin, ChangeFeedMixin, SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = Exam.objects.all()
     serializer_class = ExamSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return Exam.objects.all()
+            exams = Exam.objects.all()
         elif hasattr(user, 'teacher'):
-            return Exam.objects.filter(teacher=user.teacher)
-        return Exam.objects.filter(student__user=user)
+            exams = Exam.objects.filter(teacher=user.teacher)
+        else:
+            exams = open_exams(user)
+        return exams.order_by('id')  # Stable pages
+
+    def accessible_exam(self, queryset=None):
+        try:
+            return super().accessible_exam(queryset)
+        except Http404:
+            user = self.request.user
+            if not is_staff(user) and Exam.objects.filter(pk=self.requested_exam_id(),
+                                                          access__student__user=user).exists():
+                raise PermissionDenied('This exam is not open.')
+            raise
+
+    def retrieve(self, request, *args, **kwargs):
+        # The counters move with the answers.
+        return self.cached_exam_response(request, lambda: self.get_serializer(self.get_object()).data,
+                                         with_answers=True)
 
     @action(detail=True, methods=['get'])
     def questions(self, request, pk=None):
-        exam = self.get_object()
-        serializer = QuestionSerializer(exam.questions.all(), many=True)
-        return Response(serializer.data)
+        def build():
+            exam = self.get_object()
+            questions = exam_questions(exam, with_key=request.user.is_superuser or hasattr(request.user, 'teacher'))
+            return QuestionSerializer(questions, many=True, context=self.get_serializer_context()).data
+        return self.cached_exam_response(request, build)
+
+    @action(detail=True, methods=['get'])
+    def analytics(self, request, pk=None):
+        """Score distribution and item statistics of the exam (see analytics.py)."""
+        if not (request.user.is_superuser or hasattr(request.user, 'teacher')):
+            raise PermissionDenied('Exam analytics are only available to teachers.')
+        return Response(exam_analytics(self.get_object()))
 
-class QuestionViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get'])
+    def bundle(self, request, pk=None):
+        """
+        The exam with its student-safe questions in one precomputed document
+        (see bundles.py). Students only get it while the exam is open to
+        them; staff, like prewarm_bundles, may build it ahead of time.
+        """
+        exam = self.accessible_exam()
+        version, payload = exam_bundle(exam)
+        return self.conditional_response(request, f'"bundle-{exam.id}-{version}"', version,
+                                         lambda: HttpResponse(payload, content_type='application/json'))
+
+class QuestionViewSet(BulkWriteMixin, SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    bulk_serializer_class = QuestionWriteSerializer
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return Question.objects.all()
+            questions = Question.objects.all()
         elif hasattr(user, 'teacher'):
-            return Question.objects.filter(exam__teacher=user.teacher)
-        return Question.objects.filter(exam__student__user=user)
+            questions = Question.objects.filter(exam__teacher=user.teacher)
+        else:
+            questions = Question.objects.filter(exam__in=open_exams(user))
+        return questions.order_by('id')  # Stable pages
 
-class StudentAnswerViewSet(viewsets.ModelViewSet):
+    def bulk_written(self, instances, created):
+        # bulk_create() and bulk_update() send no signals to the question cache or counters.
+        for exam_id in {question.exam_id for question in instances}:
+            invalidate_exam(exam_id)
+        if created:
+            for exam_id, count in Counter(question.exam_id for question in instances).items():
+                bump(exam_id, question_count=count)
+
+class StudentAnswerViewSet(ChangeFeedMixin, BulkWriteMixin, SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = StudentAnswer.objects.all()
     serializer_class = StudentAnswerSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    bulk_serializer_class = StudentAnswerWriteSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
@@ -77,10 +170,32 @@ class StudentAnswerViewSet(viewsets.ModelViewSet):
             return StudentAnswer.objects.filter(question__exam__teacher=user.teacher)
         return StudentAnswer.objects.filter(student__user=user)
 
-class ExamResultViewSet(viewsets.ModelViewSet):
+    def get_bulk_queryset(self):
+        return self.get_queryset().select_related('question')  # Scores are checked against their question.
+
+    def validate_bulk_create(self, rows):
+        return duplicate_errors(rows, StudentAnswer, ['student', 'question'],
+                                'The student has already answered this question.')
+
+    def perform_update(self, serializer):
+        self.bulk_written([serializer.save()], created=False)
+
+    def bulk_written(self, instances, created):
+        question_exams = dict(Question.objects.filter(id__in={answer.question_id for answer in instances})
+                              .values_list('id', 'exam_id'))
+        students_by_exam = {}
+        for answer in instances:
+            students_by_exam.setdefault(question_exams[answer.question_id], set()).add(answer.student_id)
+        for exam_id, exam in exams_by_id(students_by_exam).items():
+            max_score = AnswerKey(exam_questions(exam, with_key=True)).max_score
+            refresh_grades(exam, students_by_exam[exam_id], max_score=max_score)
+
+class ExamResultViewSet(ChangeFeedMixin, FlatListMixin, BulkWriteMixin, SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = ExamResult.objects.all()
     serializer_class = ExamResultSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    bulk_serializer_class = ExamResultWriteSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
@@ -90,10 +205,55 @@ class ExamResultViewSet(viewsets.ModelViewSet):
             return ExamResult.objects.filter(exam__teacher=user.teacher)
         return ExamResult.objects.filter(student__user=user)
 
-class StudentLedgerViewSet(viewsets.ModelViewSet):
+    def validate_bulk_create(self, rows):
+        return duplicate_errors(rows, ExamResult, ['student', 'exam'], 'The student already has a result for this exam.')
+
+    def perform_update(self, serializer):
+        self.bulk_written([serializer.save()], created=False)
+
+    def bulk_written(self, instances, created):
+        totals_by_exam = {}
+        for result in instances:
+            result.percentage = percentage(result.total_score, result.max_score)
+            totals_by_exam.setdefault(result.exam_id, {})[result.student_id] = result.total_score
+        ExamResult.objects.bulk_update(instances, stamp(instances, ['percentage']))
+        if created:
+            for exam_id, totals in totals_by_exam.items():
+                bump(exam_id, submission_count=len(totals), score_total=sum(totals.values()))
+        else:
+            # The totals the update replaced are not known here.
+            recount(Exam.objects.filter(id__in=totals_by_exam))
+        # The results are already up to date; this mirrors the totals into the ledger.
+        for exam_id, exam in exams_by_id(totals_by_exam).items():
+            save_totals(exam, totals_by_exam[exam_id])
+
+class ExamAttemptViewSet(SelectRelatedMixin, viewsets.ReadOnlyModelViewSet):
+    """Attempts, optionally of one ?exam= and with one ?status= (e.g. status=submitted: still to grade)."""
+    queryset = ExamAttempt.objects.all()
+    serializer_class = ExamAttemptSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            attempts = ExamAttempt.objects.all()
+        elif hasattr(user, 'teacher'):
+            attempts = ExamAttempt.objects.filter(exam__teacher=user.teacher)
+        else:
+            attempts = ExamAttempt.objects.filter(student__user=user)
+        params = self.request.query_params
+        if params.get('exam', '').isdigit():
+            attempts = attempts.filter(exam_id=params['exam'])
+        if params.get('status') in dict(ExamAttempt.STATUS_CHOICES):
+            attempts = attempts.filter(status=params['status'])
+        return attempts
+
+class StudentLedgerViewSet(ChangeFeedMixin, FlatListMixin, SelectRelatedMixin, viewsets.ModelViewSet):
     queryset = StudentLedger.objects.all()
     serializer_class = StudentLedgerSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    permission_classes = [IsStaffOrReadOnly]
 
     def get_queryset(self):
         user = self.request.user
@@ -102,3 +262,26 @@ class StudentLedgerViewSet(viewsets.ModelViewSet):
         elif hasattr(user, 'teacher'):
             return StudentLedger.objects.filter(student__teachers=user.teacher)
         return StudentLedger.objects.filter(student__user=user)
+
+class ApiTokenViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                      mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """
+    The user's API tokens. POST issues one and returns its key, once;
+    DELETE revokes it. Tokens can be issued with a session or Basic auth.
+    """
+    queryset = ApiToken.objects.all()
+    serializer_class = ApiTokenSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return ApiToken.objects.filter(user=self.request.user).order_by('-id')
+
+    def perform_create(self, serializer):
+        days = serializer.validated_data.pop('expires_in_days', None)
+        expires_at = timezone.now() + timedelta(days=days) if days else None
+        token, key = issue_token(self.request.user, serializer.validated_data.get('name', ''), expires_at)
+        token.key = key
+        serializer.instance = token
+
+    def perform_destroy(self, instance):
+        revoke_token(instance)
@@ -0,0 +1,48 @@
+"""
+Async versions of the student exam views, served without a thread per
+request when the project runs under an ASGI server (see README). The
+submission itself still runs in a thread through sync_to_async, as
+transaction.atomic() is not available to async code.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import Http404
+from django.shortcuts import redirect, render
+
+from .caching import aexam_questions
+from .models import ExamAttempt, Student, StudentAnswer
+from .submission import answer_formset, build_answers, start_attempt, submit_answers
+
+
+@login_required
+async def take_exam(request, exam_id):
+    # The templates read request.user synchronously, so resolve it up front.
+    request.user = await request.auser()
+    student = await Student.objects.filter(user=request.user).afirst()
+    if student is None:
+        return redirect('home')
+
+    exam = await student.get_open_exams().select_related('teacher__user').filter(id=exam_id).afirst()
+    if exam is None:
+        raise Http404('No Exam matches the given query.')
+
+    attempt = await sync_to_async(start_attempt)(exam, student, create=request.method != 'POST')
+    if attempt.status != ExamAttempt.STARTED:
+        return redirect('exam_submitted' if request.method == 'POST' else 'exam_already_taken')
+
+    questions = await aexam_questions(exam, with_key=request.method == 'POST')
+    StudentAnswerFormSet = answer_formset(questions)
+
+    if request.method == 'POST':
+        formset = StudentAnswerFormSet(request.POST, queryset=StudentAnswer.objects.none())
+        if formset.is_valid():
+            await sync_to_async(submit_answers)(exam, attempt, build_answers(formset, questions, attempt), questions)
+            return redirect('exam_submitted')
+    else:
+        formset = StudentAnswerFormSet(queryset=StudentAnswer.objects.none())
+
+    return render(request, 'exams/student/take_exam.html', {
+        'exam': exam,
+        'formset': formset,
+        'questions': questions
+    })
@@ -0,0 +1,38 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throw-away test database, so they never touch the
+data of the configured database.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """Create a fresh test database for the duration of the block."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    # The debug log handler would otherwise write every captured query to disk.
+    db_logger = logging.getLogger('django.db.backends')
+    level = db_logger.level
+    db_logger.setLevel(logging.INFO)
+    try:
+        yield
+    finally:
+        db_logger.setLevel(level)
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def measure(func, *args, **kwargs):
+    """Call ``func`` and return (result, seconds, number of queries)."""
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+    return result, elapsed, len(queries.captured_queries)
@@ -0,0 +1,76 @@
+"""
+Precomputed exam bundles: everything a student needs to sit an exam (the
+exam's details, instructions, timing and its questions without answers) as
+one JSON document, built once per exam version (see caching.py).
+
+When a timed exam opens, every student asks for the bundle at once. Only
+the request that wins the build lock builds it; the others wait for it to
+appear in the cache, and build it themselves only if that takes longer
+than BUILD_WAIT. `manage.py prewarm_bundles` builds bundles of exams about
+to open ahead of time.
+"""
+import json
+import time
+import uuid
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .caching import CACHE_TIMEOUT, exam_questions, exam_version
+from .models import Exam
+
+EXAM_FIELDS = ('id', 'title', 'subject', 'description', 'instructions', 'grade', 'is_timed',
+               'start_datetime', 'end_datetime', 'duration_hours', 'duration_minutes')
+LOCK_TIMEOUT = 30  # Seconds before a crashed builder's lock expires.
+BUILD_WAIT = 5
+POLL_INTERVAL = 0.05
+
+
+def bundle_key(exam_id, version):
+    return f'exam:{exam_id}:v{version}:bundle'
+
+
+def build_bundle(exam, version):
+    bundle = {field: getattr(exam, field) for field in EXAM_FIELDS}
+    bundle['version'] = str(version)
+    bundle['questions'] = [
+        {'id': question.id, 'question_text': question.question_text, 'answer_choices': question.answer_choices}
+        for question in exam_questions(exam)
+    ]
+    return json.dumps(bundle, cls=DjangoJSONEncoder).encode()
+
+
+def build_and_store(exam, version):
+    if exam.get_deferred_fields():
+        exam = Exam.objects.get(id=exam.id)
+    payload = build_bundle(exam, version)
+    cache.set(bundle_key(exam.id, version), payload, CACHE_TIMEOUT)
+    return payload
+
+
+def exam_bundle(exam):
+    """
+    Return (version, JSON bytes) of the bundle of ``exam``, which may be
+    loaded with only its id and updated_at.
+    """
+    version = exam_version(exam)
+    key = bundle_key(exam.id, version)
+    payload = cache.get(key)
+    if payload is not None:
+        return version, payload
+
+    lock_key, token = key + ':lock', uuid.uuid4().hex
+    if cache.add(lock_key, token, LOCK_TIMEOUT):
+        try:
+            return version, build_and_store(exam, version)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    deadline = time.monotonic() + BUILD_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        payload = cache.get(key)
+        if payload is not None:
+            return version, payload
+    return version, build_and_store(exam, version)
@@ -0,0 +1,165 @@
+"""
+Versioned per-exam cache of question sets.
+
+Keys carry the exam's version stamps, read from its row: updated_at for the
+exam and its questions, answers_changed_at for its answers. Code that
+changes questions in bulk must call invalidate_exam(). The a-prefixed
+functions are the async variants.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Exam, ExamAttempt, ExamResult, Question, Student, StudentAnswer, delete_origin
+
+CACHE_TIMEOUT = 60 * 60
+STUDENT_FIELDS = ('id', 'question_text', 'answer_choices')
+TEACHER_FIELDS = STUDENT_FIELDS + ('correct_answer',)
+COUNTERS = ('hits', 'misses')
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def stamp_of(moment):
+    """Version stamp, in nanoseconds, of a change at ``moment`` (0 for never)."""
+    if moment is None:
+        return 0
+    return (moment - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def questions_key(exam_id, version, view):
+    return f'exam:{exam_id}:v{version}:questions:{view}'
+
+
+def exam_version(exam):
+    return stamp_of(exam.updated_at)
+
+
+def answers_version(exam):
+    return stamp_of(exam.answers_changed_at)
+
+
+def invalidate_exam(exam_id):
+    Exam.objects.filter(pk=exam_id).update(updated_at=timezone.now())
+
+
+def invalidate_answers(exam_id):
+    Exam.objects.filter(pk=exam_id).update(answers_changed_at=timezone.now())
+
+
+def count(name):
+    try:
+        cache.incr(f'exam_cache:{name}')
+    except ValueError:
+        cache.add(f'exam_cache:{name}', 1, None)
+
+
+async def acount(name):
+    try:
+        await cache.aincr(f'exam_cache:{name}')
+    except ValueError:
+        await cache.aadd(f'exam_cache:{name}', 1, None)
+
+
+def cache_stats():
+    """Return the hit and miss counters of the question cache."""
+    return {name: cache.get(f'exam_cache:{name}', 0) for name in COUNTERS}
+
+
+def question_views(exam, version, teacher_rows):
+    """Cache entries of both views built from the teacher rows."""
+    student_rows = [{field: row[field] for field in STUDENT_FIELDS} for row in teacher_rows]
+    return {
+        questions_key(exam.id, version, 'teacher'): teacher_rows,
+        questions_key(exam.id, version, 'student'): student_rows,
+    }
+
+
+def exam_question_rows(exam):
+    return Question.objects.filter(exam_id=exam.id).order_by('id').values(*TEACHER_FIELDS)
+
+
+def load_questions(exam, version, view):
+    """Read the questions of ``exam`` once, cache both views and return ``view``."""
+    entries = question_views(exam, version, list(exam_question_rows(exam)))
+    cache.set_many(entries, CACHE_TIMEOUT)
+    return entries[questions_key(exam.id, version, view)]
+
+
+async def aload_questions(exam, version, view):
+    entries = question_views(exam, version, [row async for row in exam_question_rows(exam)])
+    await cache.aset_many(entries, CACHE_TIMEOUT)
+    return entries[questions_key(exam.id, version, view)]
+
+
+def exam_questions(exam, with_key=False):
+    """
+    Return the questions of ``exam`` as Question instances built from the
+    cache. Without ``with_key`` their correct_answer is left empty.
+    """
+    view = 'teacher' if with_key else 'student'
+    version = exam_version(exam)
+    rows = cache.get(questions_key(exam.id, version, view))
+    if rows is None:
+        count('misses')
+        rows = load_questions(exam, version, view)
+    else:
+        count('hits')
+    return [Question(exam=exam, **row) for row in rows]
+
+
+async def aexam_questions(exam, with_key=False):
+    view = 'teacher' if with_key else 'student'
+    version = exam_version(exam)
+    rows = await cache.aget(questions_key(exam.id, version, view))
+    if rows is None:
+        await acount('misses')
+        rows = await aload_questions(exam, version, view)
+    else:
+        await acount('hits')
+    return [Question(exam=exam, **row) for row in rows]
+
+
+@receiver(post_save, sender=Question)
+def invalidate_question_exam(sender, instance, **kwargs):
+    invalidate_exam(instance.exam_id)
+
+
+@receiver(post_delete, sender=Question)
+def invalidate_deleted_question_exam(sender, instance, origin=None, **kwargs):
+    # Its answers went with it: bump both stamps here rather than once per answer.
+    if delete_origin(origin) is not Exam:
+        now = timezone.now()
+        Exam.objects.filter(pk=instance.exam_id).update(updated_at=now, answers_changed_at=now)
+
+
+@receiver(pre_delete, sender=Student)
+def invalidate_student_exams(sender, instance, **kwargs):
+    # Once per exam of the student rather than once per answer, result and attempt.
+    Exam.objects.filter(Q(pk__in=StudentAnswer.objects.filter(student=instance).values('question__exam_id')) |
+                        Q(pk__in=ExamResult.objects.filter(student=instance).values('exam_id')) |
+                        Q(pk__in=ExamAttempt.objects.filter(student=instance).values('exam_id'))
+                        ).update(answers_changed_at=timezone.now())
+
+
+@receiver([post_save, post_delete], sender=StudentAnswer)
+def invalidate_answer_exam(sender, instance, origin=None, **kwargs):
+    if delete_origin(origin) in (Exam, Question, Student):
+        return  # Invalidated once by the receivers above; a deleted exam needs nothing.
+    exam_id = Question.objects.filter(id=instance.question_id).values_list('exam_id', flat=True).first()
+    if exam_id is not None:
+        invalidate_answers(exam_id)
+
+
+@receiver([post_save, post_delete], sender=ExamResult)
+@receiver([post_save, post_delete], sender=ExamAttempt)
+def invalidate_result_exam(sender, instance, created=False, origin=None, **kwargs):
+    # Results and attempts feed the exam counters; a new attempt is only started.
+    if (sender is ExamAttempt and created) or delete_origin(origin) in (Exam, Student):
+        return
+    invalidate_answers(instance.exam_id)
@@ -0,0 +1,114 @@
+"""
+Change tracking for the API change feeds (see api/feed.py).
+
+Exams, answers, results and ledger entries carry an indexed updated_at;
+saves and bulk_create() set it through auto_now, but bulk_update() and
+QuerySet.update() do not, so code writing them that way must set it too:
+stamp() does so for bulk_update(). Deletions leave a Tombstone, written
+by the post_delete signal, which QuerySet.delete() also sends. Deleting an
+exam, question or student writes the tombstones of the rows it cascades to
+beforehand with one INSERT ... SELECT per table, instead of one lookup and
+insert per row.
+
+Tombstones are kept for TOMBSTONE_RETENTION; a client that has not synced
+for longer must download everything again. `manage.py purge_tombstones`
+deletes older ones.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import BigIntegerField, DateTimeField, F, Q, Value
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Exam, Question, Student, StudentAnswer, ExamResult, StudentLedger, Tombstone, delete_origin
+
+TRACKED_MODELS = (Exam, StudentAnswer, ExamResult, StudentLedger)
+TOMBSTONE_RETENTION = timedelta(days=30)
+TOMBSTONE_COLUMNS = ('model', 'object_id', 'exam_id', 'student_id', 'teacher_id', 'deleted_at')
+# Tracked rows deleted along with an exam, question or student, by their lookup to it.
+CASCADES = {
+    Exam: {StudentAnswer: 'question__exam', ExamResult: 'exam', StudentLedger: 'exam'},
+    Question: {StudentAnswer: 'question'},
+    Student: {StudentAnswer: 'student', ExamResult: 'student', StudentLedger: 'student'},
+}
+EXAM_IDS = {StudentAnswer: F('question__exam_id'), ExamResult: F('exam_id'), StudentLedger: F('exam_id')}
+
+
+def stamp(instances, fields):
+    """Set updated_at on ``instances`` and return ``fields`` plus it, for bulk_update()."""
+    now = timezone.now()
+    for instance in instances:
+        instance.updated_at = now
+    return [*fields, 'updated_at']
+
+
+def visible_tombstones(user, model):
+    """Tombstones of ``model`` for the rows ``user`` could see before they were deleted."""
+    tombstones = Tombstone.objects.filter(model=model._meta.model_name)
+    if user.is_superuser:
+        return tombstones
+    if hasattr(user, 'teacher'):
+        if model is Exam:
+            return tombstones.filter(teacher_id=user.teacher.id)
+        return tombstones.filter(Q(exam_id__in=Exam.objects.filter(teacher=user.teacher).values('id')) |
+                                 Q(student_id__in=Student.objects.filter(teachers=user.teacher).values('id')))
+    if model is Exam:
+        return tombstones.filter(teacher_id__in=Student.teachers.through.objects
+                                 .filter(student__user=user).values('teacher_id'))
+    return tombstones.filter(student_id__in=Student.objects.filter(user=user).values('id'))
+
+
+def purge_tombstones(now=None):
+    now = now or timezone.now()
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=now - TOMBSTONE_RETENTION).delete()
+    return deleted
+
+
+def insert_tombstones(rows, now):
+    """Write the tombstones of the rows of queryset ``rows`` with one INSERT ... SELECT."""
+    select = rows.order_by().annotate(
+        tombstone_model=Value(rows.model._meta.model_name),
+        tombstone_object_id=F('pk'),
+        tombstone_exam_id=EXAM_IDS[rows.model],
+        tombstone_student_id=F('student_id'),
+        tombstone_teacher_id=Value(None, output_field=BigIntegerField()),
+        tombstone_deleted_at=Value(now, output_field=DateTimeField()),
+    ).values(*(f'tombstone_{column}' for column in TOMBSTONE_COLUMNS))
+    sql, params = select.query.sql_with_params()
+    table = connection.ops.quote_name(Tombstone._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in TOMBSTONE_COLUMNS)
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {table} ({columns}) {sql}', params)
+
+
+@receiver(pre_delete, sender=Exam)
+@receiver(pre_delete, sender=Question)
+@receiver(pre_delete, sender=Student)
+def record_cascade_tombstones(sender, instance, origin=None, **kwargs):
+    # Only for the rows being deleted themselves: an exam's questions are covered by the exam.
+    if delete_origin(origin) is not sender:
+        return
+    now = timezone.now()
+    for model, lookup in CASCADES[sender].items():
+        insert_tombstones(model.objects.filter(**{lookup: instance}), now)
+
+
+@receiver(post_delete, sender=Exam)
+@receiver(post_delete, sender=StudentAnswer)
+@receiver(post_delete, sender=ExamResult)
+@receiver(post_delete, sender=StudentLedger)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    if sender in CASCADES.get(delete_origin(origin), ()):
+        return  # Written by record_cascade_tombstones().
+    if sender is Exam:
+        exam_id, student_id, teacher_id = instance.id, None, instance.teacher_id
+    elif sender is StudentAnswer:
+        # None if the question is already gone.
+        exam_id = Question.objects.filter(id=instance.question_id).values_list('exam_id', flat=True).first()
+        student_id, teacher_id = instance.student_id, None
+    else:
+        exam_id, student_id, teacher_id = instance.exam_id, instance.student_id, None
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk, exam_id=exam_id,
+                             student_id=student_id, teacher_id=teacher_id)
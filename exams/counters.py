@@ -0,0 +1,99 @@
+"""
+Denormalized per-exam counters: question_count, submission_count,
+graded_count and score_total (for average_score).
+
+Writers add their deltas with bump(), a single UPDATE; the signals below
+handle single-object saves and deletes. `manage.py reconcile_exam_counters`
+repairs drift.
+"""
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Exam, ExamAttempt, ExamResult, Question, delete_origin
+
+COUNTERS = ('question_count', 'submission_count', 'graded_count', 'score_total')
+
+
+def bump(exam_id, touch=False, **deltas):
+    """
+    Add ``deltas`` ({counter: n}) to the counters of exam ``exam_id`` and
+    bump its answers stamp; with ``touch``, even when no counter changes.
+    """
+    changes = {name: F(name) + delta for name, delta in deltas.items() if delta}
+    if changes or touch:
+        Exam.objects.filter(pk=exam_id).update(answers_changed_at=timezone.now(), **changes)
+
+
+def per_exam(queryset, aggregate):
+    """``aggregate`` over the outer exam's rows of ``queryset``, or 0."""
+    rows = queryset.filter(exam=OuterRef('pk')).order_by().values('exam').annotate(value=aggregate).values('value')
+    return Coalesce(Subquery(rows), Value(0), output_field=IntegerField())
+
+
+def actual_counts():
+    """{counter: expression} computing each counter from the rows it counts."""
+    return {
+        'question_count': per_exam(Question.objects.all(), Count('id')),
+        'submission_count': per_exam(ExamResult.objects.all(), Count('id')),
+        'graded_count': per_exam(ExamAttempt.objects.filter(status=ExamAttempt.GRADED), Count('id')),
+        'score_total': per_exam(ExamResult.objects.all(), Sum('total_score')),
+    }
+
+
+def drifted(exams):
+    """``exams`` whose stored counters differ from their rows."""
+    actual = {f'actual_{name}': expression for name, expression in actual_counts().items()}
+    differs = Q()
+    for name in COUNTERS:
+        differs |= ~Q(**{name: F(f'actual_{name}')})
+    return exams.annotate(**actual).filter(differs)
+
+
+def recount(exams):
+    """Recompute the counters of ``exams`` (a queryset) in one UPDATE; returns the number of exams."""
+    return exams.update(**actual_counts())
+
+
+def recount_exam(exam_id):
+    recount(Exam.objects.filter(pk=exam_id))
+
+
+@receiver(post_save, sender=Question)
+def question_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump(instance.exam_id, question_count=1)
+
+
+@receiver(post_delete, sender=Question)
+def question_deleted(sender, instance, origin=None, **kwargs):
+    if delete_origin(origin) is not Exam:  # Nothing to count on a deleted exam.
+        bump(instance.exam_id, question_count=-1)
+
+
+@receiver(post_save, sender=ExamResult)
+def result_saved(sender, instance, raw=False, **kwargs):
+    # The previous total of an updated result is gone by now.
+    if not raw:
+        recount_exam(instance.exam_id)
+
+
+@receiver(post_delete, sender=ExamResult)
+def result_deleted(sender, instance, origin=None, **kwargs):
+    if delete_origin(origin) is not Exam:
+        bump(instance.exam_id, submission_count=-1, score_total=-instance.total_score)
+
+
+@receiver(post_save, sender=ExamAttempt)
+def attempt_saved(sender, instance, created, raw=False, **kwargs):
+    # New attempts are started, not graded; edits (e.g. in the admin) may change the status.
+    if not created and not raw:
+        recount_exam(instance.exam_id)
+
+
+@receiver(post_delete, sender=ExamAttempt)
+def attempt_deleted(sender, instance, origin=None, **kwargs):
+    if instance.status == ExamAttempt.GRADED and delete_origin(origin) is not Exam:
+        bump(instance.exam_id, graded_count=-1)
@@ -0,0 +1,119 @@
+"""
+Streaming exports of exam results, ledger entries and student answers.
+
+Rows are read with ``values_list().iterator()`` (a server-side cursor where
+the database supports one) and encoded one at a time, so an export uses
+constant memory and the first bytes go out before the query is exhausted.
+"""
+import csv
+import datetime
+import json
+
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils import timezone
+
+from .models import ExamResult, StudentLedger, StudentAnswer
+
+CHUNK_SIZE = 2000
+
+# Per export: model, exported columns, and the lookups used by each filter.
+EXPORTS = {
+    'results': {
+        'model': ExamResult,
+        'columns': ['id', 'student_id', 'student__user__username', 'exam_id', 'exam__title', 'exam__subject',
+                    'total_score', 'max_score', 'percentage', 'completed_at', 'time_taken'],
+        'exam': 'exam_id',
+        'teacher': 'exam__teacher_id',
+        'grade': 'exam__grade',
+        'date': 'completed_at',
+    },
+    'ledger': {
+        'model': StudentLedger,
+        'columns': ['id', 'student_id', 'student__user__username', 'exam_id', 'exam__title', 'subject',
+                    'date', 'score', 'teacher_name'],
+        'exam': 'exam_id',
+        'teacher': 'exam__teacher_id',
+        'grade': 'exam__grade',
+        'date': 'date',
+    },
+    'answers': {
+        'model': StudentAnswer,
+        'columns': ['id', 'student_id', 'student__user__username', 'question__exam_id', 'question_id',
+                    'answer', 'score', 'created_at'],
+        'exam': 'question__exam_id',
+        'teacher': 'question__exam__teacher_id',
+        'grade': 'question__exam__grade',
+        'date': 'created_at',
+    },
+}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+def parse_when(value, end=False):
+    """Parse a date or datetime filter; a bare ``end`` date covers the whole day."""
+    when = parse_datetime(value)
+    if when is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value}')
+        when = datetime.datetime.combine(day, datetime.time.max if end else datetime.time.min)
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    return when
+
+
+def export_rows(kind, exam=None, teacher=None, grade=None, since=None, until=None):
+    """Return the filtered ``values_list`` queryset of an export, ordered by id."""
+    spec = EXPORTS[kind]
+    filters = {}
+    if exam:
+        filters[spec['exam']] = int(exam)
+    if teacher:
+        filters[spec['teacher']] = int(teacher)
+    if grade:
+        filters[spec['grade']] = int(grade)
+    if since:
+        filters[f"{spec['date']}__gte"] = parse_when(since)
+    if until:
+        filters[f"{spec['date']}__lte"] = parse_when(until, end=True)
+    return spec['model'].objects.filter(**filters).order_by('id').values_list(*spec['columns'])
+
+
+def encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return str(value)
+    return value
+
+
+class Echo:
+    """File-like object whose write() hands the written line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([encode_value(value) for value in row])
+
+
+def iter_jsonl(columns, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(columns, map(encode_value, row)))) + '\n'
+
+
+def stream_export(kind, export_format='csv', **filters):
+    """Yield the encoded lines of an export."""
+    rows = export_rows(kind, **filters).iterator(chunk_size=CHUNK_SIZE)
+    columns = EXPORTS[kind]['columns']
+    if export_format == 'jsonl':
+        return iter_jsonl(columns, rows)
+    return iter_csv(columns, rows)
@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm, SetPasswordForm, AuthenticationForm
 from .models import Student, Teacher, Exam, Question, StudentAnswer
+from .scoring import AnswerKey
 
 
 class LoginForm(AuthenticationForm):
@@ -100,10 +101,12 @@ class GradeForm(forms.Form):
         student_answers = kwargs.pop('student_answers', None)
         super(GradeForm, self).__init__(*args, **kwargs)
         if student_answers:
+            # Up to the question's points, so a total never exceeds the exam's max_score.
+            points = AnswerKey({answer.question for answer in student_answers}).points
             for answer in student_answers:
                 self.fields[f'score_{answer.id}'] = forms.IntegerField(
                     label=f'Score for {answer.student.user.username} - {answer.question.question_text}',
                     min_value=0,
-                    max_value=100,
+                    max_value=points[answer.question_id],
                     initial=answer.score
                 )
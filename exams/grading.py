@@ -0,0 +1,244 @@
+"""
+Set-based grading for exams.
+
+Applies a teacher's scores and refreshes the derived ExamResult,
+StudentLedger and ExamAttempt rows in one transaction, using bulk statements so the number
+of queries does not grow with the number of students.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.utils import timezone
+
+from .caching import exam_questions
+from .changes import stamp
+from .counters import bump
+from .models import StudentAnswer, ExamResult, StudentLedger, ExamAttempt
+from .scoring import AnswerKey, percentage
+
+logger = logging.getLogger(__name__)
+
+
+# Answers shown on one grading page, and the orderings a teacher can grade in.
+GRADING_PAGE_SIZE = 50
+GRADING_UNITS = {
+    'student': 'student_id',
+    'question': 'question_id',
+}
+
+
+def student_totals(exam, student_ids=None):
+    """
+    Return {student_id: total score} for every graded student of ``exam``,
+    or only for ``student_ids`` when given.
+    """
+    answers = StudentAnswer.objects.filter(question__exam=exam, score__isnull=False)
+    if student_ids is not None:
+        answers = answers.filter(student_id__in=student_ids)
+    return dict(answers.order_by().values_list('student_id').annotate(total=Sum('score')))
+
+
+def format_cursor(cursor):
+    return '{}-{}'.format(*cursor)
+
+
+def parse_cursor(value):
+    """Parse a 'unit_id-answer_id' cursor; returns None when it is missing or malformed."""
+    try:
+        unit_id, answer_id = (int(part) for part in value.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return unit_id, answer_id
+
+
+def grading_page(exam, by='student', after=None, pending_only=True, size=GRADING_PAGE_SIZE):
+    """
+    Return one keyset page of answers of ``exam`` ordered by student or
+    question, as (answers, cursor of the last answer, whether more follow).
+    """
+    unit = GRADING_UNITS[by]
+    answers = (StudentAnswer.objects.filter(question__exam=exam)
+               .select_related('student__user', 'question')
+               .order_by(unit, 'id'))
+    if pending_only:
+        answers = answers.filter(score__isnull=True)
+    if after:
+        unit_id, answer_id = after
+        answers = answers.filter(Q(**{f'{unit}__gt': unit_id}) | Q(**{unit: unit_id, 'id__gt': answer_id}))
+    page = list(answers[:size + 1])
+    has_more = len(page) > size
+    page = page[:size]
+    cursor = (getattr(page[-1], unit), page[-1].id) if page else None
+    return page, cursor, has_more
+
+
+def apply_scores(exam, answers, scores):
+    """
+    Save ``scores`` (a mapping of answer id to score) onto ``answers`` and
+    refresh the ExamResult and StudentLedger rows of ``exam``.
+
+    ``answers`` must be the already loaded StudentAnswer instances of the
+    exam; only those whose score actually changed are written, and only
+    the totals of their students are refreshed.
+    Returns the {student_id: total score} mapping that was stored.
+    """
+    changed = []
+    for answer in answers:
+        if answer.id in scores and answer.score != scores[answer.id]:
+            answer.score = scores[answer.id]
+            changed.append(answer)
+
+    with transaction.atomic():
+        if changed:
+            StudentAnswer.objects.bulk_update(changed, stamp(changed, ['score']))
+        totals = refresh_grades(exam, {answer.student_id for answer in answers})
+
+    logger.debug(f"Graded exam {exam.id}: {len(changed)} answers changed, {len(totals)} students")
+    return totals
+
+
+def save_totals(exam, totals, max_score=None, ledger=True, times=None, graded=0):
+    """
+    Upsert the ExamResult rows for ``totals`` and, unless ``ledger`` is
+    false, the matching StudentLedger rows. ``max_score`` replaces the
+    stored maximum when given; new results otherwise get the points the
+    exam's questions are worth. Percentages follow the stored maximum.
+    ``times`` ({student id: time taken}) is stored on the results, and
+    ``graded`` attempts closed with them are added to the exam's counters.
+    Returns {student_id: result id} of every result of the exam.
+    """
+    if not totals and not graded:
+        return {}
+    times = times or {}
+
+    results = {}
+    for result in ExamResult.objects.filter(exam=exam).only('id', 'student_id', 'total_score', 'max_score'):
+        results.setdefault(result.student_id, result)
+
+    to_update = []
+    to_create = []
+    score_change = 0
+    new_max_score = max_score
+    if new_max_score is None and not totals.keys() <= results.keys():
+        # Results first created by grading get the points the exam can give.
+        new_max_score = AnswerKey(exam_questions(exam, with_key=True)).max_score
+    for student_id, total in totals.items():
+        result = results.get(student_id)
+        if result is None:
+            result = ExamResult(student_id=student_id, exam=exam, max_score=new_max_score)
+            to_create.append(result)
+        elif (result.total_score != total or (max_score is not None and result.max_score != max_score) or
+              student_id in times):
+            if max_score is not None:
+                result.max_score = max_score
+            to_update.append(result)
+        score_change += total - result.total_score
+        result.total_score = total
+        result.percentage = percentage(total, result.max_score)
+        if student_id in times:
+            result.time_taken = times[student_id]
+    fields = ['total_score', 'max_score', 'percentage'] + (['time_taken'] if times else [])
+    if to_update:
+        ExamResult.objects.bulk_update(to_update, stamp(to_update, fields))
+    if to_create:
+        # Upsert: a concurrent save_totals() may have created some of them since they were read.
+        ExamResult.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=['student', 'exam'],
+            update_fields=fields + ['updated_at'],
+        )
+    # Every bulk write of answers or scores ends here: one UPDATE for the counters and the answers stamp.
+    bump(exam.id, touch=True, submission_count=len(to_create), score_total=score_change, graded_count=graded)
+    results.update((result.student_id, result) for result in to_create)
+    result_ids = {student_id: result.id for student_id, result in results.items()}
+
+    if not ledger or not totals:
+        return result_ids
+
+    # Keep the teacher name of existing entries when the exam has lost its teacher.
+    teacher_name = exam.teacher.user.username if exam.teacher else 'Unknown'
+    StudentLedger.objects.bulk_create(
+        [
+            StudentLedger(
+                student_id=student_id,
+                exam=exam,
+                subject=exam.subject,
+                date=exam.created_at,
+                score=total,
+                teacher_name=teacher_name,
+            )
+            for student_id, total in totals.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['student', 'exam'],
+        update_fields=['score', 'teacher_name', 'updated_at'] if exam.teacher else ['score', 'updated_at'],
+    )
+    return result_ids
+
+
+def attempt_states(exam, student_ids=None):
+    """
+    Return {student_id: row} for the students with answers to ``exam``, or
+    only ``student_ids``. A row counts their answers without a score
+    (ungraded) and without an attempt (unlinked), and holds the status,
+    submitted_at and result of their attempt (None without one).
+    """
+    answers = StudentAnswer.objects.filter(question__exam=exam)
+    if student_ids is not None:
+        answers = answers.filter(student_id__in=student_ids)
+    attempt = ExamAttempt.objects.filter(exam=exam, student_id=OuterRef('student_id'))
+    rows = answers.order_by().values('student_id').annotate(
+        ungraded=Count('id', filter=Q(score__isnull=True)),
+        unlinked=Count('id', filter=Q(attempt__isnull=True)),
+        status=Subquery(attempt.values('status')[:1]),
+        submitted_at=Subquery(attempt.values('submitted_at')[:1]),
+        result=Subquery(attempt.values('result')[:1]),
+    )
+    return {row['student_id']: row for row in rows}
+
+
+def graded_change(states):
+    """Change of the exam's graded attempts once save_attempts() has stored ``states``."""
+    return sum((not row['ungraded']) - (row['status'] == ExamAttempt.GRADED) for row in states.values())
+
+
+def save_attempts(exam, states, results):
+    """
+    Bring the ExamAttempt rows of the students in ``states`` (see
+    attempt_states()) in line with their answers of ``exam``: graded once
+    none is left without a score, linked to their result in ``results``,
+    and owning the answers stored without one (e.g. through the API).
+    Missing attempts are created as submitted now.
+    """
+    if not states:
+        return
+    now = timezone.now()
+    ExamAttempt.objects.bulk_create(
+        [
+            ExamAttempt(student_id=student_id, exam=exam, submitted_at=row['submitted_at'] or now,
+                        result_id=results.get(student_id, row['result']),
+                        status=ExamAttempt.SUBMITTED if row['ungraded'] else ExamAttempt.GRADED)
+            for student_id, row in states.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['student', 'exam'],
+        update_fields=['status', 'result', 'submitted_at'],
+    )
+    unlinked = [student_id for student_id, row in states.items() if row['unlinked']]
+    if unlinked:
+        StudentAnswer.objects.filter(question__exam=exam, student_id__in=unlinked, attempt__isnull=True).update(
+            attempt_id=Subquery(ExamAttempt.objects.filter(exam=exam, student_id=OuterRef('student_id')).values('id')[:1]))
+
+
+def refresh_grades(exam, student_ids=None, max_score=None):
+    """
+    Recompute the results, ledger entries and attempts of ``exam`` from the
+    answer scores of ``student_ids`` (default: every student with answers),
+    bumping the counters once. Returns {student_id: total score}.
+    """
+    states = attempt_states(exam, student_ids)
+    totals = student_totals(exam, student_ids)
+    save_attempts(exam, states, save_totals(exam, totals, max_score=max_score, graded=graded_change(states)))
+    return totals
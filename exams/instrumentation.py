@@ -0,0 +1,140 @@
+"""
+Per-request SQL recording and query budgets.
+
+QueryBudgetMiddleware counts the queries of every request and checks them
+against the QUERY_BUDGETS setting, e.g. {'take_exam': 15}, by view name.
+Set QUERY_BUDGETS_ENFORCE to raise instead of logging a warning.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+active_recorders = ContextVar('active_recorders', default=())
+
+
+def record_query(execute, sql, params, many, context):
+    recorders = active_recorders.get()
+    if not recorders:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        for recorder in recorders:
+            recorder.queries.append((sql, duration))
+
+
+@receiver(connection_created)
+def install_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class QueryRecorder:
+    """Context manager recording (sql, seconds) for every statement executed inside it."""
+
+    def __init__(self):
+        self.queries = []
+        self._token = None
+
+    def __enter__(self):
+        # Connections opened before this module was imported missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            install_wrapper(None, connection)
+        self._token = active_recorders.set(active_recorders.get() + (self,))
+        return self
+
+    def __exit__(self, *exc_info):
+        active_recorders.reset(self._token)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for sql, duration in self.queries)
+
+    def duplicates(self):
+        """Statements run more than once (same SQL, any parameters), most repeated first."""
+        counts = Counter(sql for sql, duration in self.queries)
+        return [(sql, count) for sql, count in counts.most_common() if count > 1]
+
+    def slowest(self, limit=5):
+        return sorted(self.queries, key=lambda query: query[1], reverse=True)[:limit]
+
+    def summary(self, label):
+        lines = [f'{label}: {self.count} queries in {self.total_time * 1000:.1f}ms']
+        for sql, count in self.duplicates()[:5]:
+            lines.append(f'  repeated {count}x: {sql[:200]}')
+        for sql, duration in self.slowest(3):
+            lines.append(f'  {duration * 1000:.1f}ms: {sql[:200]}')
+        return '\n'.join(lines)
+
+
+def check_budget(label, recorder, budget, enforce=False):
+    """Log, or raise when ``enforce`` is set, if ``recorder`` used more than ``budget`` queries."""
+    if budget is None or recorder.count <= budget:
+        return
+    message = f'Query budget of {budget} exceeded by ' + recorder.summary(label)
+    if enforce:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+@contextmanager
+def query_budget(limit, label='block'):
+    """Raise QueryBudgetExceeded when the block runs more than ``limit`` queries."""
+    with QueryRecorder() as recorder:
+        yield recorder
+    check_budget(label, recorder, limit, enforce=True)
+
+
+class QueryBudgetMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    async def __acall__(self, request):
+        with QueryRecorder() as recorder:
+            response = await self.get_response(request)
+        return self.finish(request, response, recorder)
+
+    def finish(self, request, response, recorder):
+        match = request.resolver_match
+        view_name = match.view_name if match else request.path
+        if logger.isEnabledFor(logging.DEBUG):  # The summary sorts and groups every query.
+            logger.debug(recorder.summary(view_name))
+        check_budget(view_name, recorder, getattr(settings, 'QUERY_BUDGETS', {}).get(view_name),
+                     enforce=getattr(settings, 'QUERY_BUDGETS_ENFORCE', False))
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.total_time * 1000:.1f}'
+        return response
@@ -0,0 +1,46 @@
+import base64
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from exams.benchmarking import benchmark_database
+from exams.models import Teacher, Exam
+from exams.tokens import issue_token
+
+
+class Command(BaseCommand):
+    help = 'Compares API requests per second with Basic and with token authentication'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scheme')
+        parser.add_argument('--url', default='/api/exam-results/')
+
+    def handle(self, *args, **options):
+        password = 'bench-password'
+        with benchmark_database():
+            user = User.objects.create_user('bench_teacher', password=password)
+            teacher = Teacher.objects.create(user=user)
+            Exam.objects.create(title='Benchmark', subject='Benchmark', teacher=teacher, grade=10)
+            token, key = issue_token(user, 'benchmark')
+            basic = base64.b64encode(f'{user.username}:{password}'.encode()).decode()
+            schemes = [('basic', f'Basic {basic}'), ('token', f'Token {key}')]
+
+            client = Client()
+            rates = {}
+            for name, header in schemes:
+                response = client.get(options['url'], HTTP_AUTHORIZATION=header)
+                if response.status_code != 200:
+                    self.stderr.write(f'{name}: {options["url"]} returned {response.status_code}')
+                    continue
+                start = time.perf_counter()
+                for _ in range(options['requests']):
+                    client.get(options['url'], HTTP_AUTHORIZATION=header)
+                elapsed = time.perf_counter() - start
+                rates[name] = options['requests'] / elapsed
+                self.stdout.write(f'{name:<6} {rates[name]:>8.1f} req/s  '
+                                  f'{elapsed / options["requests"] * 1000:>7.2f} ms/request')
+
+        if len(rates) == 2:
+            self.stdout.write(self.style.SUCCESS(f'Token auth is {rates["token"] / rates["basic"]:.1f}x faster.'))
@@ -0,0 +1,123 @@
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from exams.access import rebuild_exam_access
+from exams.benchmarking import benchmark_database
+from exams.models import Teacher, Student, Exam, Question, StudentAnswer
+from project_exams.database import PROFILES
+
+
+class Command(BaseCommand):
+    help = ('Measures concurrent exam submission throughput with each database profile '
+            '(see project_exams/database.py), using the same synthetic workload')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=['sqlite', 'sqlite-tuned'])
+        parser.add_argument('--processes', type=int, default=8, help='Concurrent submitting processes')
+        parser.add_argument('--students', type=int, default=200, help='Submissions, one per student')
+        parser.add_argument('--questions', type=int, default=20)
+        parser.add_argument('--run', action='store_true', help='Run the workload with the current profile only')
+
+    def handle(self, *args, **options):
+        workload = ['--processes', str(options['processes']), '--students', str(options['students']),
+                    '--questions', str(options['questions'])]
+        if options['run']:
+            self.stdout.write(json.dumps(self.run(options['processes'], options['students'], options['questions'])))
+            return
+
+        self.stdout.write(f"{'profile':<14} {'submissions/s':>14} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+        for profile in options['profiles']:
+            # Each profile needs its own settings, hence its own process.
+            process = subprocess.run([sys.executable, '-m', 'django', 'bench_databases', '--run'] + workload,
+                                     cwd=settings.BASE_DIR, capture_output=True, text=True,
+                                     env={**os.environ, 'DATABASE_PROFILE': profile})
+            if process.returncode:
+                error = (process.stderr.strip().splitlines() or ['no output'])[-1]
+                self.stdout.write(f'{profile:<14} failed: {error}')
+                continue
+            result = json.loads(process.stdout.strip().splitlines()[-1])
+            self.stdout.write(f"{profile:<14} {result['throughput']:>14.1f} {result['p50_ms']:>8.1f} "
+                              f"{result['p95_ms']:>8.1f} {result['failed']:>7}")
+
+    def run(self, processes, students, questions):
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                # The default in-memory test database cannot be shared with the worker processes.
+                connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+            with benchmark_database():
+                url, sessions = self.prepare(students, questions)
+                latencies, failed = self.submit_all(url, sessions, processes, questions)
+                stored = StudentAnswer.objects.count()
+        elapsed = latencies.pop()
+        return {
+            'throughput': (students - failed) / elapsed,
+            'p50_ms': statistics.median(latencies) * 1000,
+            'p95_ms': statistics.quantiles(latencies, n=20)[-1] * 1000,
+            'failed': failed,
+            'answers_stored': stored,
+        }
+
+    def prepare(self, students, questions):
+        teacher = Teacher.objects.create(user=User.objects.create_user('bench_teacher'))
+        exam = Exam.objects.create(title='Benchmark', subject='Benchmark', teacher=teacher, grade=10)
+        Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {i}', correct_answer='a', answer_choices=['a', 'b', 'c'])
+            for i in range(questions)
+        ])
+        users = User.objects.bulk_create([User(username=f'bench_student_{i}') for i in range(students)])
+        student_objs = Student.objects.bulk_create([Student(user=user, grade=10) for user in users])
+        Student.teachers.through.objects.bulk_create([
+            Student.teachers.through(student_id=student.id, teacher_id=teacher.id) for student in student_objs
+        ])
+        rebuild_exam_access(exam)
+
+        sessions = []
+        for user in users:
+            client = Client()
+            client.force_login(user)
+            sessions.append(client.cookies[settings.SESSION_COOKIE_NAME].value)
+        return reverse('take_exam_sync', args=[exam.id]), sessions
+
+    def submit_all(self, url, sessions, processes, questions):
+        """Submit from ``processes`` processes; return (latencies + [total seconds], failures)."""
+        data = {'form-TOTAL_FORMS': questions, 'form-INITIAL_FORMS': 0}
+        data.update({f'form-{i}-answer': 'a' if i % 2 else 'b' for i in range(questions)})
+        # Forked workers must not share the parent's connections.
+        connections.close_all()
+        if hasattr(connection, 'close_pool'):
+            connection.close_pool()
+        start = time.perf_counter()
+        with multiprocessing.get_context('fork').Pool(processes) as pool:
+            results = pool.starmap(submit, [(url, data, sessions[i::processes]) for i in range(processes)])
+        elapsed = time.perf_counter() - start
+        outcomes = [outcome for result in results for outcome in result]
+        return [latency for latency, ok in outcomes] + [elapsed], sum(1 for latency, ok in outcomes if not ok)
+
+
+def submit(url, data, sessions):
+    """Worker process: post the exam once per session; return [(seconds, succeeded)]."""
+    outcomes = []
+    for session in sessions:
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = session
+        start = time.perf_counter()
+        try:
+            ok = client.post(url, data).status_code == 302
+        except Exception:
+            ok = False  # e.g. "database is locked"
+        outcomes.append((time.perf_counter() - start, ok))
+    connections.close_all()
+    return outcomes
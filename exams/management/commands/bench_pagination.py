@@ -0,0 +1,95 @@
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.pagination import Cursor, PageNumberPagination
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from exams.api.pagination import KeysetPagination
+from exams.api.views import StudentAnswerViewSet
+from exams.benchmarking import benchmark_database, measure
+from exams.models import Teacher, Student, Exam, Question, StudentAnswer
+from exams.seeding import insert_answers
+
+URL = '/api/student-answers/'
+
+
+class PageNumber(PageNumberPagination):
+    """The previous pagination, on the same ordering as the keyset pages."""
+    page_size_query_param = 'page_size'
+    max_page_size = KeysetPagination.max_page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset.order_by('-id'), request, view)
+
+
+class Command(BaseCommand):
+    help = ('Compares latency of deep pages of the student answer API with page-number '
+            'and keyset (cursor) pagination')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Answers in the benchmark table')
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+        parser.add_argument('--runs', type=int, default=5, help='Requests measured per page')
+
+    def handle(self, *args, **options):
+        size = options['page_size']
+        if max(options['pages']) * size > options['rows']:
+            raise CommandError('--rows is too small for the deepest page.')
+
+        with benchmark_database():
+            self.fill(options['rows'])
+            admin = User.objects.create_superuser('bench_admin', password=None)
+            ids = list(StudentAnswer.objects.order_by('-id').values_list('id', flat=True))
+            views = {
+                'page number': StudentAnswerViewSet.as_view({'get': 'list'}, pagination_class=PageNumber),
+                'keyset': StudentAnswerViewSet.as_view({'get': 'list'}),
+            }
+            rows = []
+            for page in options['pages']:
+                urls = {
+                    'page number': f'{URL}?page={page}&page_size={size}',
+                    'keyset': self.cursor_url(ids, page, size),
+                }
+                rows.append((page, {name: self.bench(views[name], urls[name], admin, options['runs'])
+                                    for name in views}))
+
+        self.stdout.write(f"{'page':>8} {'page number ms':>15} {'queries':>8} {'keyset ms':>10} {'queries':>8}")
+        for page, results in rows:
+            (number_ms, number_queries), (keyset_ms, keyset_queries) = results['page number'], results['keyset']
+            self.stdout.write(f'{page:>8} {number_ms:>15.2f} {number_queries:>8} {keyset_ms:>10.2f} '
+                              f'{keyset_queries:>8}')
+
+    def fill(self, rows):
+        """One exam of 100 questions answered by enough students for ``rows`` answers."""
+        teacher = Teacher.objects.create(user=User.objects.create_user('bench_teacher'))
+        exam = Exam.objects.create(title='Benchmark', subject='Benchmark', teacher=teacher, grade=10)
+        questions = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {i}', correct_answer='a', answer_choices=['a', 'b'])
+            for i in range(100)
+        ])
+        users = User.objects.bulk_create([User(username=f'bench_student_{i}') for i in range(-(-rows // 100))])
+        students = Student.objects.bulk_create([Student(user=user, grade=10) for user in users])
+        answers = [(student.id, question.id, 'a', 1) for student in students for question in questions]
+        insert_answers(answers[:rows])
+
+    def cursor_url(self, ids, page, size):
+        if page == 1:
+            return f'{URL}?page_size={size}'
+        # A keyset page starts after the last row of the previous one.
+        paginator = KeysetPagination()
+        paginator.base_url = f'{URL}?page_size={size}'
+        return paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(ids[(page - 1) * size - 1])))
+
+    def bench(self, view, url, user, runs):
+        factory = APIRequestFactory()
+        timings = []
+        for _ in range(runs):
+            request = factory.get(url)
+            force_authenticate(request, user)
+            response, elapsed, queries = measure(lambda: view(request).render())
+            if response.status_code != 200:
+                raise CommandError(f'{url} returned {response.status_code}')
+            timings.append(elapsed)
+        return statistics.median(timings) * 1000, queries
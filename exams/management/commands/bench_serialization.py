@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from exams.api.flat import flat_plan, plan_columns, serialize_rows
+from exams.api.serializers import ExamResultSerializer, StudentLedgerSerializer
+from exams.benchmarking import benchmark_database
+from exams.models import Teacher, Student, Exam, ExamResult, StudentLedger
+
+
+class Command(BaseCommand):
+    help = ('Compares the DRF serializers with the flat .values() path for exam results and '
+            'ledger entries at several list sizes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--runs', type=int, default=5, help='Measurements per list size')
+
+    def handle(self, *args, **options):
+        lines = []
+        with benchmark_database():
+            self.fill(max(options['rows']))
+            context = {'request': Request(APIRequestFactory().get('/'))}
+            for model, serializer_class in [(ExamResult, ExamResultSerializer),
+                                            (StudentLedger, StudentLedgerSerializer)]:
+                for rows in options['rows']:
+                    queryset = model.objects.order_by('-id')[:rows]
+                    plan = flat_plan(serializer_class(context=context))
+                    columns = plan_columns(plan)
+                    serializer_ms = self.bench(
+                        lambda: serializer_class(queryset, many=True, context=context).data, options['runs'])
+                    flat_ms = self.bench(lambda: serialize_rows(plan, queryset.values(*columns)), options['runs'])
+                    lines.append((model.__name__, rows, serializer_ms, flat_ms))
+
+        self.stdout.write(f"{'model':<14} {'rows':>7} {'serializer ms':>14} {'flat ms':>9} {'speedup':>8}")
+        for name, rows, serializer_ms, flat_ms in lines:
+            self.stdout.write(f'{name:<14} {rows:>7} {serializer_ms:>14.2f} {flat_ms:>9.2f} '
+                              f'{serializer_ms / flat_ms:>7.1f}x')
+
+    def fill(self, rows):
+        """One result and one ledger entry for each of ``rows`` students."""
+        teacher = Teacher.objects.create(user=User.objects.create_user('bench_teacher'))
+        exam = Exam.objects.create(title='Benchmark', subject='Benchmark', teacher=teacher, grade=10)
+        users = User.objects.bulk_create([User(username=f'bench_student_{i}') for i in range(rows)])
+        students = Student.objects.bulk_create([Student(user=user, grade=10) for user in users])
+        ExamResult.objects.bulk_create([
+            ExamResult(student=student, exam=exam, total_score=i % 40, max_score=40, percentage=(i % 40) * 2.5)
+            for i, student in enumerate(students)
+        ])
+        StudentLedger.objects.bulk_create([
+            StudentLedger(student=student, exam=exam, subject=exam.subject, date=timezone.now(), score=i % 40,
+                          teacher_name='bench_teacher')
+            for i, student in enumerate(students)
+        ])
+
+    def bench(self, func, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
@@ -0,0 +1,51 @@
+import statistics
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from exams.benchmarking import benchmark_database, measure
+from exams.models import Teacher, Student, Exam, Question
+
+
+class Command(BaseCommand):
+    help = 'Measures queries and latency of one exam submission for several exam sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', type=int, nargs='+', default=[10, 50, 200],
+                            help='Exam sizes to benchmark')
+        parser.add_argument('--runs', type=int, default=5, help='Submissions measured per exam size')
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            rows = [self.benchmark(size, options['runs']) for size in options['questions']]
+
+        self.stdout.write(f"{'questions':>10} {'queries':>8} {'median ms':>10} {'max ms':>8}")
+        for size, queries, timings in rows:
+            self.stdout.write(f'{size:>10} {queries:>8} {statistics.median(timings) * 1000:>10.1f} '
+                              f'{max(timings) * 1000:>8.1f}')
+
+    def benchmark(self, size, runs):
+        teacher = Teacher.objects.create(user=User.objects.create_user(f'bench_teacher_{size}'))
+        exam = Exam.objects.create(title=f'Benchmark {size}', subject='Benchmark', teacher=teacher, grade=10)
+        Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'Question {i}', correct_answer='a', answer_choices=['a', 'b', 'c'])
+            for i in range(size)
+        ])
+        url = reverse('take_exam', args=[exam.id])
+        data = {'form-TOTAL_FORMS': size, 'form-INITIAL_FORMS': 0}
+        data.update({f'form-{i}-answer': 'a' if i % 2 else 'b' for i in range(size)})
+
+        queries = 0
+        timings = []
+        for run in range(runs):
+            student = Student.objects.create(user=User.objects.create_user(f'bench_student_{size}_{run}'), grade=10)
+            student.teachers.add(teacher)
+            client = Client()
+            client.force_login(student.user)
+            response, elapsed, queries = measure(client.post, url, data)
+            if response.status_code != 302:
+                self.stderr.write(f'Submission of {size} questions failed with status {response.status_code}')
+            timings.append(elapsed)
+        return size, queries, timings
@@ -0,0 +1,141 @@
+import json
+import random
+import statistics
+import subprocess
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from exams.benchmarking import benchmark_database, measure
+from exams.models import Student, Teacher, Exam
+from exams.seeding import seed
+
+# Arguments of exams.seeding.seed() for each data scale.
+SCALES = {
+    'small': {'teachers': 5, 'students': 50, 'exams': 5, 'questions': 10},
+    'medium': {'teachers': 20, 'students': 500, 'exams': 20, 'questions': 40},
+    'large': {'teachers': 50, 'students': 3000, 'exams': 60, 'questions': 40},
+}
+
+API_LISTS = ['user', 'student', 'teacher', 'exam', 'question', 'studentanswer', 'examresult', 'studentledger']
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throw-away database at several scales and records wall time, query count '
+            'and response size of the key views as JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', nargs='+', choices=sorted(SCALES), default=['small', 'medium'])
+        parser.add_argument('--runs', type=int, default=5, help='Requests measured per view')
+        parser.add_argument('--output', '-o', help='File to write the JSON report to (default: stdout)')
+
+    def handle(self, *args, **options):
+        report = {
+            'commit': git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'runs': options['runs'],
+            'scales': {},
+        }
+        for scale in options['scales']:
+            with benchmark_database():
+                counts = seed(rng=random.Random(0), **SCALES[scale])
+                report['scales'][scale] = {'data': counts, 'views': self.bench_scale(options['runs'])}
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+    def bench_scale(self, runs):
+        results = {}
+        for name, prepare in self.cases():
+            timings = []
+            for _ in range(runs):
+                request = prepare()
+                response, elapsed, queries = measure(request)
+                timings.append(elapsed)
+            results[name] = {
+                'status': response.status_code,
+                'queries': queries,
+                'bytes': len(response.content),
+                'median_ms': round(statistics.median(timings) * 1000, 2),
+                'min_ms': round(min(timings) * 1000, 2),
+                'max_ms': round(max(timings) * 1000, 2),
+            }
+            if response.status_code >= 500:
+                sys.stderr.write(f'{name} returned {response.status_code}\n')
+        return results
+
+    def client(self, user):
+        client = Client(raise_request_exception=False)
+        client.force_login(user)
+        return client
+
+    def new_student(self, exam):
+        """A student who may take ``exam`` but has not submitted it yet."""
+        user = User.objects.create_user(f'bench_student_{User.objects.count()}')
+        student = Student.objects.create(user=user, grade=exam.grade)
+        student.teachers.add(exam.teacher)
+        return student
+
+    def cases(self):
+        """
+        Yield (name, prepare) pairs; prepare() does any per-run setup and
+        returns the zero-argument callable that is measured.
+        """
+        teacher = Teacher.objects.annotate(exams=Count('exam')).order_by('-exams', 'id').first()
+        exam = (Exam.objects.filter(teacher=teacher).annotate(questions_count=Count('questions'))
+                .order_by('-questions_count', 'id').first())
+        if teacher is None or exam is None:
+            raise CommandError('The seeded data has no exams to benchmark.')
+        student = (Student.objects.filter(teachers=teacher, grade=exam.grade)
+                   .annotate(entries=Count('ledger_entries')).order_by('-entries', 'id').first())
+        admin = User.objects.create_superuser('bench_admin', password=None)
+
+        admin_client = self.client(admin)
+        teacher_client = self.client(teacher.user)
+        student_client = self.client(student.user)
+        taker_client = self.client(self.new_student(exam).user)
+        take_url = reverse('take_exam', args=[exam.id])
+        grade_url = reverse('grade_exam', args=[exam.id]) + '?all=1'
+
+        def take_exam_post():
+            client = self.client(self.new_student(exam).user)
+            questions = exam.questions.count()
+            data = {'form-TOTAL_FORMS': questions, 'form-INITIAL_FORMS': 0}
+            data.update({f'form-{i}-answer': 'A' for i in range(questions)})
+            return lambda: client.post(take_url, data)
+
+        def grade_exam_post():
+            answers = teacher_client.get(grade_url).context['student_answers']
+            data = {f'score_{answer.id}': 1 for answer in answers}
+            return lambda: teacher_client.post(grade_url, data)
+
+        yield 'dashboard', lambda: lambda: admin_client.get(reverse('dashboard'))
+        yield 'student_homepage', lambda: lambda: student_client.get(reverse('student_homepage'))
+        yield 'take_exam GET', lambda: lambda: taker_client.get(take_url)
+        yield 'take_exam POST', take_exam_post
+        yield 'grade_exam GET', lambda: lambda: teacher_client.get(grade_url)
+        yield 'grade_exam POST', grade_exam_post
+        yield 'student_list', lambda: lambda: admin_client.get(reverse('student_list'))
+        yield 'view_student_ledger', lambda: lambda: teacher_client.get(
+            reverse('view_student_ledger', args=[student.id]))
+        for basename in API_LISTS:
+            url = reverse(f'{basename}-list')
+            yield f'api {basename} list', lambda url=url: lambda: admin_client.get(url)
+        yield 'api exam questions', lambda: lambda: admin_client.get(reverse('exam-questions', args=[exam.id]))
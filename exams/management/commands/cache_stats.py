@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from exams.caching import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows the hit and miss counters of the exam question cache'
+
+    def handle(self, *args, **kwargs):
+        stats = cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        ratio = stats['hits'] * 100 / lookups if lookups else 0.0
+        self.stdout.write(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit ratio: {ratio:.1f}%")
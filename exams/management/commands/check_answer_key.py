@@ -0,0 +1,53 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from exams.benchmarking import benchmark_database
+from exams.models import Student, Exam
+from exams.seeding import seed
+
+ANSWER_KEY_FIELD = b'"correct_answer"'
+
+
+def student_urls(exam_id):
+    """API reads open to students that carry questions, directly or expanded."""
+    return [
+        '/api/questions/',
+        '/api/questions/?expand=exam',
+        '/api/questions/?fields=id,correct_answer',
+        '/api/student-answers/?expand=question',
+        '/api/student-answers/?fields=id,question.correct_answer',
+        '/api/student-answers/changes/?expand=question',
+        f'/api/exams/{exam_id}/questions/',
+        f'/api/exams/{exam_id}/bundle/',
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throw-away database and checks that no API response a student can get '
+            'contains the answer key')
+
+    def handle(self, *args, **options):
+        failures = []
+        with benchmark_database():
+            seed(teachers=2, students=20, exams=4, questions=5, rng=random.Random(0))
+            student = Student.objects.filter(examresult__isnull=False).select_related('user').first()
+            exam = Exam.objects.filter(examresult__student=student).first()
+            client = Client()
+            client.force_login(student.user)
+            for url in student_urls(exam.id):
+                response = client.get(url, HTTP_ACCEPT='application/json')
+                leaks = ANSWER_KEY_FIELD in response.content
+                if response.status_code != 200 or leaks:
+                    failures.append(url)
+                self.stdout.write(f"{'LEAK' if leaks else response.status_code:<6} {url}")
+
+            # Teachers do get the key.
+            client.force_login(exam.teacher.user)
+            if ANSWER_KEY_FIELD not in client.get('/api/questions/', HTTP_ACCEPT='application/json').content:
+                failures.append('/api/questions/ (teacher)')
+
+        if failures:
+            raise CommandError(f'{len(failures)} responses leak the answer key or failed: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('No student response contains the answer key.'))
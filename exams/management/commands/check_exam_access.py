@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.access import expected_access, rebuild_student_access
+from exams.models import ExamAccess
+
+
+class Command(BaseCommand):
+    help = 'Compares the student to exam access table with the access it should contain'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rebuild the access of affected students')
+
+    def handle(self, *args, **options):
+        expected = {(row.student_id, row.exam_id): (row.opens_at, row.closes_at) for row in expected_access()}
+        actual = {
+            (student_id, exam_id): (opens_at, closes_at)
+            for student_id, exam_id, opens_at, closes_at in
+            ExamAccess.objects.values_list('student_id', 'exam_id', 'opens_at', 'closes_at').iterator()
+        }
+        missing = expected.keys() - actual.keys()
+        extra = actual.keys() - expected.keys()
+        stale = {pair for pair in expected.keys() & actual.keys() if expected[pair] != actual[pair]}
+
+        self.stdout.write(f'Missing: {len(missing)}  Extra: {len(extra)}  Stale window: {len(stale)}')
+        affected = {student_id for student_id, exam_id in missing | extra | stale}
+        if not affected:
+            self.stdout.write(self.style.SUCCESS('Exam access is consistent.'))
+        elif options['fix']:
+            rebuild_student_access(affected)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt access for {len(affected)} students.'))
+        else:
+            raise CommandError(f'Exam access is inconsistent for {len(affected)} students; run with --fix.')
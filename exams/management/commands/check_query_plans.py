@@ -0,0 +1,80 @@
+import random
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from exams.benchmarking import benchmark_database
+from exams.models import Student, Exam, ExamAccess, ExamAttempt, StudentAnswer, ExamResult, StudentLedger
+from exams.seeding import seed
+
+FULL_SCAN = {
+    'sqlite': r'\bSCAN {table}\b(?! USING COVERING INDEX)',
+    'postgresql': r'\bSeq Scan on {table}\b',
+}
+
+
+def hot_queries(student, exam, now):
+    """(name, queryset, model whose table must be reached through an index) of the key read paths."""
+    return [
+        ('already taken', ExamAttempt.objects.filter(student=student, exam=exam), ExamAttempt),
+        ('latest attempt', ExamAttempt.objects.filter(student=student, submitted_at__isnull=False)
+         .order_by('-submitted_at')[:1], ExamAttempt),
+        ('attempts to grade', ExamAttempt.objects.filter(exam=exam, status=ExamAttempt.SUBMITTED), ExamAttempt),
+        ('answers of an attempt', StudentAnswer.objects.filter(attempt__student=student, attempt__exam=exam),
+         StudentAnswer),
+        ('answers to grade', StudentAnswer.objects.filter(question__exam=exam, score__isnull=True), StudentAnswer),
+        ('result of an exam', ExamResult.objects.filter(student=student, exam=exam), ExamResult),
+        ('latest result', ExamResult.objects.filter(student=student).order_by('-completed_at')[:1], ExamResult),
+        ('ledger by date', StudentLedger.objects.filter(student=student).order_by('date'), StudentLedger),
+        ('exams of a grade and teacher',
+         Exam.objects.filter(grade=exam.grade, teacher_id=exam.teacher_id), Exam),
+        ('timed exams opening soon',
+         Exam.objects.filter(is_timed=True, start_datetime__gte=now, start_datetime__lte=now + timedelta(hours=1)),
+         Exam),
+        ('open exams of a student', student.get_open_exams(now), ExamAccess),
+        ('result changes', ExamResult.objects.filter(updated_at__gt=now).order_by('updated_at', 'id')[:500],
+         ExamResult),
+        ('ledger changes', StudentLedger.objects.filter(updated_at__gt=now).order_by('updated_at', 'id')[:500],
+         StudentLedger),
+    ]
+
+
+def seeded_plans():
+    """Seed the current database and yield (name, plan, whether it scans a whole table) per hot query."""
+    seed(teachers=5, students=60, exams=8, questions=10, rng=random.Random(0))
+    if connection.vendor == 'postgresql':
+        # Tiny tables are cheaper to scan; ask whether an index could serve the query at all.
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+    student = Student.objects.filter(examresult__isnull=False).first()
+    exam = Exam.objects.filter(examresult__student=student).first()
+    for name, queryset, model in hot_queries(student, exam, timezone.now()):
+        plan = queryset.explain()
+        yield name, plan, bool(re.search(FULL_SCAN[connection.vendor].format(table=model._meta.db_table), plan))
+
+
+class Command(BaseCommand):
+    help = ('Seeds a throw-away database and checks with EXPLAIN that the hot queries reach their '
+            'tables through indexes instead of full scans')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN:
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}.')
+        failures = []
+        with benchmark_database():
+            for name, plan, full_scan in seeded_plans():
+                if full_scan:
+                    failures.append(name)
+                self.stdout.write(f"{'FULL SCAN' if full_scan else 'ok':<10} {name}")
+                if full_scan or options['verbose_plans']:
+                    self.stdout.write('    ' + plan.replace('\n', '\n    '))
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries scan a whole table: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('Every hot query uses an index.'))
@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.exports import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = 'Streams exam results, ledger entries or student answers as CSV or JSON Lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='export_format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--exam', type=int, help='Only rows of this exam id')
+        parser.add_argument('--teacher', type=int, help='Only rows of exams by this teacher id')
+        parser.add_argument('--grade', type=int, help='Only rows of exams for this grade')
+        parser.add_argument('--since', help='Only rows dated on or after this date/datetime')
+        parser.add_argument('--until', help='Only rows dated on or before this date/datetime')
+        parser.add_argument('--output', '-o', help='File to write to (default: stdout)')
+
+    def handle(self, *args, **options):
+        filters = {name: options[name] for name in ('exam', 'teacher', 'grade', 'since', 'until')}
+        try:
+            lines = stream_export(options['kind'], options['export_format'], **filters)
+        except ValueError as e:
+            raise CommandError(e)
+
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for line in lines:
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from exams.tokens import issue_token
+
+
+class Command(BaseCommand):
+    help = 'Issues an API token for a user and prints its key, which is not stored'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help='What the token is used for')
+        parser.add_argument('--days', type=int, help='Days until the token expires (default: never)')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+        expires_at = timezone.now() + timedelta(days=options['days']) if options['days'] else None
+        token, key = issue_token(user, options['name'], expires_at)
+        self.stdout.write(key)
+        self.stderr.write(self.style.SUCCESS(
+            f'Issued token #{token.id} ({token.prefix}...) for {user.username}'
+            + (f', expires {expires_at:%Y-%m-%d %H:%M}' if expires_at else '')
+            + '. Send it as "Authorization: Token <key>".'))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from exams.bundles import exam_bundle
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = 'Builds the cached bundles of timed exams that start within the next N minutes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=30, help='Look-ahead window in minutes')
+
+    def handle(self, *args, **options):
+        if 'locmem' in settings.CACHES['default']['BACKEND']:
+            self.stderr.write(self.style.WARNING(
+                'The cache is in-memory per process; bundles built here are not seen by the web server. '
+                'Set REDIS_URL to share it.'))
+        now = timezone.now()
+        exams = Exam.objects.filter(is_timed=True, start_datetime__gte=now,
+                                    start_datetime__lte=now + timedelta(minutes=options['minutes']))
+        built = 0
+        for exam in exams.order_by('start_datetime'):
+            version, payload = exam_bundle(exam)
+            built += 1
+            self.stdout.write(f'{exam.title} (#{exam.id}) opens {exam.start_datetime:%Y-%m-%d %H:%M}: '
+                              f'{len(payload)} bytes')
+        self.stdout.write(self.style.SUCCESS(f'Prewarmed {built} exam bundles.'))
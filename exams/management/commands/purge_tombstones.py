@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from exams.changes import TOMBSTONE_RETENTION, purge_tombstones
+
+
+class Command(BaseCommand):
+    help = f'Deletes the change feed tombstones older than {TOMBSTONE_RETENTION.days} days'
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} tombstones.'))
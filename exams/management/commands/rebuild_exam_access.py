@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from exams.access import rebuild_all_access
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the student to exam access table from students, teachers and exams'
+
+    def handle(self, *args, **kwargs):
+        written = rebuild_all_access()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt exam access: {written} rows.'))
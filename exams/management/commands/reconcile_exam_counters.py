@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exams.counters import drifted, recount
+from exams.models import Exam
+
+
+class Command(BaseCommand):
+    help = ('Recounts the denormalized exam counters (questions, submissions, graded attempts, score total) '
+            'and repairs those that drifted, a chunk of exams at a time')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report the exams whose counters drifted')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Exams checked per transaction')
+
+    def handle(self, *args, **options):
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            ids = list(Exam.objects.filter(id__gt=last_id).order_by('id')
+                       .values_list('id', flat=True)[:options['chunk_size']])
+            if not ids:
+                break
+            last_id = ids[-1]
+            checked += len(ids)
+            with transaction.atomic():
+                stale = list(drifted(Exam.objects.filter(id__in=ids)).values_list('id', flat=True))
+                if stale and not options['dry_run']:
+                    recount(Exam.objects.filter(id__in=stale))
+            repaired += len(stale)
+
+        if not repaired:
+            self.stdout.write(self.style.SUCCESS(f'The counters of all {checked} exams are correct.'))
+        elif options['dry_run']:
+            self.stdout.write(f'{repaired} of {checked} exams have drifted counters; run without --dry-run to repair.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired the counters of {repaired} of {checked} exams.'))
@@ -0,0 +1,82 @@
+import operator
+from functools import reduce
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min, OuterRef, Q, Subquery
+
+from exams.models import ExamAttempt, ExamResult, StudentLedger
+
+# Table name: (model, aggregate picking the row kept of each (student, exam) pair). The ledger keeps
+# its first entry, as scripts/remove_duplicate_ledger_entries.py did; results keep the newest, as
+# migration 0018 did.
+TABLES = {
+    'ledger': (StudentLedger, Min),
+    'results': (ExamResult, Max),
+}
+
+
+def duplicate_groups(model, keep, after=None, limit=500):
+    """
+    Up to ``limit`` (student, exam) pairs of ``model`` with more than one
+    row, after the pair ``after``, with their row count and the id kept.
+    One GROUP BY query along the (student, exam) index.
+    """
+    rows = model.objects.order_by()
+    if after:
+        student_id, exam_id = after
+        rows = rows.filter(Q(student_id__gt=student_id) | Q(student_id=student_id, exam_id__gt=exam_id))
+    return list(rows.values('student_id', 'exam_id')
+                .annotate(rows=Count('id'), keep=keep('id'))
+                .filter(rows__gt=1)
+                .order_by('student_id', 'exam_id')[:limit])
+
+
+def pairs_q(groups):
+    return reduce(operator.or_, (Q(student_id=group['student_id'], exam_id=group['exam_id']) for group in groups))
+
+
+def remove_group_duplicates(model, groups):
+    """Delete every row of ``groups`` but the kept one; returns the number of ``model`` rows deleted."""
+    with transaction.atomic():
+        deleted, per_model = (model.objects.filter(pairs_q(groups))
+                              .exclude(id__in=[group['keep'] for group in groups]).delete())
+        if model is ExamResult:
+            # Attempts that pointed to a removed result now point to the kept one.
+            (ExamAttempt.objects.filter(pairs_q(groups), result__isnull=True).exclude(status=ExamAttempt.STARTED)
+             .update(result=Subquery(ExamResult.objects.filter(student_id=OuterRef('student_id'),
+                                                               exam_id=OuterRef('exam_id')).values('id')[:1])))
+    return per_model.get(model._meta.label, 0)
+
+
+class Command(BaseCommand):
+    help = ('Removes duplicate (student, exam) rows from the ledger and the exam results, '
+            'a bounded chunk of duplicated pairs at a time')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tables', nargs='+', choices=TABLES, default=list(TABLES))
+        parser.add_argument('--dry-run', action='store_true', help='Only count the duplicates')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Duplicated pairs handled per transaction')
+
+    def handle(self, *args, **options):
+        for name in options['tables']:
+            model, keep = TABLES[name]
+            pairs = duplicates = removed = 0
+            after = None
+            while True:
+                groups = duplicate_groups(model, keep, after, options['chunk_size'])
+                if not groups:
+                    break
+                after = groups[-1]['student_id'], groups[-1]['exam_id']
+                pairs += len(groups)
+                duplicates += sum(group['rows'] - 1 for group in groups)
+                if not options['dry_run']:
+                    removed += remove_group_duplicates(model, groups)
+
+            if not duplicates:
+                self.stdout.write(self.style.SUCCESS(f'{name}: no duplicates.'))
+            elif options['dry_run']:
+                self.stdout.write(f'{name}: {duplicates} duplicate rows in {pairs} (student, exam) pairs.')
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{name}: removed {removed} duplicate rows from {pairs} (student, exam) pairs.'))
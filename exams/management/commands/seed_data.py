@@ -0,0 +1,43 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from exams.seeding import seed
+
+
+class Command(BaseCommand):
+    help = 'Fills the database with synthetic teachers, students, exams, questions and submitted answers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teachers', type=int, default=10)
+        parser.add_argument('--students', type=int, default=300)
+        parser.add_argument('--exams', type=int, default=20)
+        parser.add_argument('--questions', type=int, default=40, help='Questions per exam')
+        parser.add_argument('--submission-rate', type=float, default=1.0,
+                            help="Share of each exam's eligible students who submitted it")
+        parser.add_argument('--correct-rate', type=float, default=0.7, help='Share of correct answers')
+        parser.add_argument('--prefix', default='seed', help='Prefix of generated usernames and exam titles')
+        parser.add_argument('--password', default='password', help='Password of every generated user')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            counts = seed(
+                teachers=options['teachers'],
+                students=options['students'],
+                exams=options['exams'],
+                questions=options['questions'],
+                submission_rate=options['submission_rate'],
+                correct_rate=options['correct_rate'],
+                prefix=options['prefix'],
+                password=options['password'],
+                rng=random.Random(options['seed']),
+            )
+        except IntegrityError as e:
+            raise CommandError(f'Could not seed the database (is the prefix already used?): {e}')
+        elapsed = time.perf_counter() - start
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {elapsed:.1f}s.'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:24
+
+from django.db import migrations
+from django.db.models import Min
+
+
+def remove_duplicate_answers(apps, schema_editor):
+    # Keep the first answer of every (student, question) pair so the constraint can be added.
+    StudentAnswer = apps.get_model('exams', 'StudentAnswer')
+    first_ids = (StudentAnswer.objects.order_by().values('student_id', 'question_id')
+                 .annotate(first_id=Min('id')).values('first_id'))
+    StudentAnswer.objects.exclude(id__in=first_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_examresult_completed_at_examresult_max_score_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_answers, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='studentanswer',
+            unique_together={('student', 'question')},
+        ),
+    ]
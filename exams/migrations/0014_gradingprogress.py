@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_studentanswer_unique_student_question'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('student', 'By student'), ('question', 'By question')], default='student', max_length=10)),
+                ('last_unit_id', models.BigIntegerField(blank=True, null=True)),
+                ('last_answer_id', models.BigIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grading_progress', to='exams.exam')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='exams.teacher')),
+            ],
+            options={
+                'unique_together': {('exam', 'teacher')},
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 20:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_exam_access(apps, schema_editor):
+    Student = apps.get_model('exams', 'Student')
+    ExamAccess = apps.get_model('exams', 'ExamAccess')
+    pairs = (Student.objects.filter(teachers__exam__grade=F('grade'))
+             .values_list('id', 'teachers__exam__id', 'teachers__exam__is_timed',
+                          'teachers__exam__start_datetime', 'teachers__exam__end_datetime'))
+    ExamAccess.objects.bulk_create(
+        [ExamAccess(student_id=student_id, exam_id=exam_id,
+                    opens_at=start if is_timed else None, closes_at=end if is_timed else None)
+         for student_id, exam_id, is_timed, start, end in pairs.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0014_gradingprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opens_at', models.DateTimeField(blank=True, null=True)),
+                ('closes_at', models.DateTimeField(blank=True, null=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access', to='exams.exam')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='exam_access', to='exams.student')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'opens_at', 'closes_at'], name='examaccess_student_window')],
+                'unique_together': {('student', 'exam')},
+            },
+        ),
+        migrations.RunPython(backfill_exam_access, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:13
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_updated_at(apps, schema_editor):
+    # New columns default to the migration time; start from the creation time instead.
+    for model, created in [('Exam', 'created_at'), ('StudentAnswer', 'created_at'), ('ExamResult', 'completed_at')]:
+        apps.get_model('exams', model).objects.update(updated_at=F(created))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0016_apitoken'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('exam_id', models.BigIntegerField(blank=True, null=True)),
+                ('student_id', models.BigIntegerField(blank=True, null=True)),
+                ('teacher_id', models.BigIntegerField(blank=True, null=True)),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='examresult',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='studentledger',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['updated_at', 'id'], name='exam_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['updated_at', 'id'], name='examresult_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(fields=['updated_at', 'id'], name='studentanswer_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='studentledger',
+            index=models.Index(fields=['updated_at', 'id'], name='studentledger_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_feed'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
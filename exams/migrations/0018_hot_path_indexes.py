@@ -0,0 +1,46 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:20
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def remove_duplicate_results(apps, schema_editor):
+    # Keep the newest result of each (student, exam) so the unique constraint can be added.
+    ExamResult = apps.get_model('exams', 'ExamResult')
+    newest = ExamResult.objects.values('student', 'exam').annotate(newest=Max('id')).values('newest')
+    ExamResult.objects.exclude(id__in=newest).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0017_change_feed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(fields=['grade', 'teacher'], name='exam_grade_teacher'),
+        ),
+        migrations.AddIndex(
+            model_name='exam',
+            index=models.Index(condition=models.Q(('is_timed', True)), fields=['start_datetime', 'end_datetime'], name='exam_timed_window'),
+        ),
+        migrations.AddIndex(
+            model_name='examresult',
+            index=models.Index(fields=['student', '-completed_at'], name='examresult_student_recent'),
+        ),
+        migrations.AddIndex(
+            model_name='studentanswer',
+            index=models.Index(condition=models.Q(('score__isnull', True)), fields=['question'], name='studentanswer_ungraded'),
+        ),
+        migrations.AddIndex(
+            model_name='studentledger',
+            index=models.Index(fields=['student', 'date'], name='studentledger_student_date'),
+        ),
+        migrations.RunPython(remove_duplicate_results, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='examresult',
+            constraint=models.UniqueConstraint(fields=('student', 'exam'), name='unique_result_student_exam'),
+        ),
+    ]
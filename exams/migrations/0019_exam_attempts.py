@@ -0,0 +1,70 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:23
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Q, Subquery
+
+
+def create_attempts(apps, schema_editor):
+    # One attempt per (student, exam) that has answers or a result; when it started is unknown.
+    ExamAttempt = apps.get_model('exams', 'ExamAttempt')
+    ExamResult = apps.get_model('exams', 'ExamResult')
+    StudentAnswer = apps.get_model('exams', 'StudentAnswer')
+    attempts = {}
+    for result_id, student_id, exam_id, completed_at in (
+            ExamResult.objects.values_list('id', 'student_id', 'exam_id', 'completed_at').iterator()):
+        attempts[student_id, exam_id] = ExamAttempt(
+            student_id=student_id, exam_id=exam_id, status='graded', started_at=completed_at,
+            submitted_at=completed_at, result_id=result_id)
+    answered = (StudentAnswer.objects.order_by().values_list('student_id', 'question__exam_id')
+                .annotate(first=Min('created_at'), pending=Count('id', filter=Q(score__isnull=True))))
+    for student_id, exam_id, first, pending in answered.iterator():
+        attempt = attempts.setdefault((student_id, exam_id), ExamAttempt(
+            student_id=student_id, exam_id=exam_id, status='graded', started_at=first, submitted_at=first))
+        if pending:
+            attempt.status = 'submitted'
+    ExamAttempt.objects.bulk_create(attempts.values(), batch_size=1000)
+    StudentAnswer.objects.update(attempt_id=Subquery(
+        ExamAttempt.objects.filter(student_id=OuterRef('student_id'), exam__questions=OuterRef('question_id'))
+        .values('id')[:1]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0018_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExamAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('started', 'Started'), ('submitted', 'Submitted'), ('graded', 'Graded')], default='started', max_length=10)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exams.exam')),
+                ('result', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt', to='exams.examresult')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='exams.student')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='studentanswer',
+            name='attempt',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='exams.examattempt'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['exam', 'status'], name='examattempt_exam_status'),
+        ),
+        migrations.AddIndex(
+            model_name='examattempt',
+            index=models.Index(fields=['student', '-submitted_at'], name='examattempt_student_recent'),
+        ),
+        migrations.AddConstraint(
+            model_name='examattempt',
+            constraint=models.UniqueConstraint(fields=('student', 'exam'), name='unique_attempt_student_exam'),
+        ),
+        migrations.RunPython(create_attempts, migrations.RunPython.noop),
+    ]
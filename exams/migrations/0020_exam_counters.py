@@ -0,0 +1,52 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:27
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def count_rows(apps, schema_editor):
+    Exam = apps.get_model('exams', 'Exam')
+
+    def per_exam(model, aggregate, **filters):
+        rows = (apps.get_model('exams', model).objects.filter(exam=OuterRef('pk'), **filters).order_by()
+                .values('exam').annotate(value=aggregate).values('value'))
+        return Coalesce(Subquery(rows), Value(0), output_field=IntegerField())
+
+    Exam.objects.update(
+        question_count=per_exam('Question', Count('id')),
+        submission_count=per_exam('ExamResult', Count('id')),
+        graded_count=per_exam('ExamAttempt', Count('id'), status='graded'),
+        score_total=per_exam('ExamResult', Sum('total_score')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0019_exam_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='graded_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='question_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='score_total',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='submission_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_rows, migrations.RunPython.noop),
+    ]
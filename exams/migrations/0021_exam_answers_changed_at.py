@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0020_exam_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='answers_changed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
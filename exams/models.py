@@ -45,7 +45,11 @@ class Student(models.Model):
         return f"{self.user.username} - Grade {self.grade}"
 
     def get_accessible_exams(self):
-        return Exam.objects.filter(grade=self.grade, teacher__in=self.teachers.all())
+        return Exam.objects.filter(access__student=self)
+
+    def get_open_exams(self, now=None):
+        """Accessible exams whose timed window, if any, includes ``now``."""
+        return Exam.objects.filter(open_window_q(now, prefix='access__'), access__student=self)
 
 
 class Exam(models.Model):
@@ -61,23 +65,43 @@ class Exam(models.Model):
     end_datetime = models.DateTimeField(null=True, blank=True)
     duration_hours = models.IntegerField(null=True, blank=True)
     duration_minutes = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)  # Also the version of its questions (see exams.caching)
+    answers_changed_at = models.DateTimeField(null=True, blank=True)  # Version of its answers
+    # Denormalized counters, maintained by exams.counters
+    question_count = models.IntegerField(default=0)
+    submission_count = models.IntegerField(default=0)  # Exam results
+    graded_count = models.IntegerField(default=0)  # Attempts with nothing left to grade
+    score_total = models.BigIntegerField(default=0)  # Sum of the results' total scores
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='exam_updated'),
+            models.Index(fields=['grade', 'teacher'], name='exam_grade_teacher'),
+            # Timed exams about to open (see prewarm_bundles)
+            models.Index(fields=['start_datetime', 'end_datetime'], condition=models.Q(is_timed=True),
+                         name='exam_timed_window'),
+        ]
+
+    # Written only by UPDATEs of exams.counters and exams.caching, never by save().
+    MAINTAINED_FIELDS = ('answers_changed_at', 'question_count', 'submission_count', 'graded_count', 'score_total')
 
     def __str__(self):
         return f'{self.title} - Grade {self.grade}'
 
-    def is_accessible_to_student(self, student):
-        if not self.grade == student.grade or self.teacher not in student.teachers.all():
-            return False
-            
-        if not self.is_timed:
-            return True
-            
-        current_time = timezone.now()
-        if self.start_datetime and current_time < self.start_datetime:
-            return False
-        if self.end_datetime and current_time > self.end_datetime:
-            return False
-        return True
+    def save(self, *args, **kwargs):
+        # An instance loaded before a concurrent submit must not write its stale counters back.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [field.name for field in self._meta.concrete_fields
+                                       if not field.primary_key and field.name not in self.MAINTAINED_FIELDS
+                                       and field.attname not in deferred]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_score(self):
+        if not self.submission_count:
+            return None
+        return self.score_total / self.submission_count
 
     def get_duration_minutes(self):
         if not self.is_timed:
@@ -85,6 +109,42 @@ class Exam(models.Model):
         return (self.duration_hours or 0) * 60 + (self.duration_minutes or 0)
 
 
+def open_window_q(now=None, prefix=''):
+    """
+    Q matching ExamAccess rows (reached through ``prefix``) that are open at
+    ``now``: opens_at <= now < closes_at, either bound being optional.
+    """
+    now = now or timezone.now()
+    return ((models.Q(**{f'{prefix}opens_at__isnull': True}) | models.Q(**{f'{prefix}opens_at__lte': now})) &
+            (models.Q(**{f'{prefix}closes_at__isnull': True}) | models.Q(**{f'{prefix}closes_at__gt': now})))
+
+
+def delete_origin(origin):
+    """The model whose delete() sent a pre_delete or post_delete signal with ``origin``."""
+    return origin.model if isinstance(origin, models.QuerySet) else type(origin)
+
+
+class ExamAccess(models.Model):
+    """
+    Materialized "student may take exam" relation: same grade and one of the
+    student's teachers wrote the exam. Maintained by the signals in
+    exams.access; the window columns copy the exam's timing when it is timed.
+    """
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='exam_access')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='access')
+    opens_at = models.DateTimeField(null=True, blank=True)
+    closes_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('student', 'exam')
+        indexes = [
+            models.Index(fields=['student', 'opens_at', 'closes_at'], name='examaccess_student_window'),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.exam}"
+
+
 class Question(models.Model):
     exam = models.ForeignKey(Exam, related_name='questions', on_delete=models.CASCADE)
     question_text = models.TextField()
@@ -98,9 +158,20 @@ class Question(models.Model):
 class StudentAnswer(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    attempt = models.ForeignKey('ExamAttempt', on_delete=models.CASCADE, null=True, blank=True,
+        related_name='answers')
     answer = models.CharField(max_length=200)
     score = models.IntegerField(null=True, blank=True)  # Score for the answer
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'question')
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='studentanswer_updated'),
+            # Answers still to grade, per question
+            models.Index(fields=['question'], condition=models.Q(score__isnull=True), name='studentanswer_ungraded'),
+        ]
 
     def __str__(self):
         return f"{self.student.user.username} - {self.question.question_text}: {self.answer}"
@@ -136,11 +207,58 @@ class ExamResult(models.Model):
     percentage = models.FloatField(default=0.0)  # Percentage score
     completed_at = models.DateTimeField(auto_now_add=True)  # When exam was completed
     time_taken = models.DurationField(null=True, blank=True)  # Time taken to complete exam
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'exam'], name='unique_result_student_exam'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='examresult_updated'),
+            models.Index(fields=['student', '-completed_at'], name='examresult_student_recent'),
+        ]
 
     def __str__(self):
         return f"{self.student.user.username} - {self.exam.title}: {self.total_score}"
 
 
+class ExamAttempt(models.Model):
+    """
+    One student's sitting of an exam: opened (started), answers stored
+    (submitted), nothing left to grade by hand (graded). There is at most
+    one per student and exam; see exams.submission and exams.grading.
+    """
+    STARTED = 'started'
+    SUBMITTED = 'submitted'
+    GRADED = 'graded'
+    STATUS_CHOICES = [
+        (STARTED, 'Started'),
+        (SUBMITTED, 'Submitted'),
+        (GRADED, 'Graded'),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attempts')
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='attempts')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STARTED)
+    started_at = models.DateTimeField(default=timezone.now)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    result = models.OneToOneField(ExamResult, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='attempt')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'exam'], name='unique_attempt_student_exam'),
+        ]
+        indexes = [
+            # Attempts still to grade, per exam
+            models.Index(fields=['exam', 'status'], name='examattempt_exam_status'),
+            models.Index(fields=['student', '-submitted_at'], name='examattempt_student_recent'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.user.username} - {self.exam.title} ({self.status})"
+
+
 class StudentLedger(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE,
         related_name='ledger_entries')
@@ -149,9 +267,89 @@ class StudentLedger(models.Model):
     date = models.DateTimeField()
     score = models.IntegerField()  # Score of the exam
     teacher_name = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'exam')
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='studentledger_updated'),
+            models.Index(fields=['student', 'date'], name='studentledger_student_date'),
+        ]
 
     def __str__(self):
         return f"{self.student.user.username} - {self.subject} - {self.score}"
+
+
+class GradingProgress(models.Model):
+    """Where a teacher stopped while grading an exam page by page."""
+    MODE_CHOICES = [
+        ('student', 'By student'),
+        ('question', 'By question'),
+    ]
+
+    exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name='grading_progress')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default='student')
+    last_unit_id = models.BigIntegerField(null=True, blank=True)  # Student or question id of the last graded page
+    last_answer_id = models.BigIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('exam', 'teacher')
+
+    def __str__(self):
+        return f"{self.teacher} - {self.exam.title} ({self.mode})"
+
+    @property
+    def cursor(self):
+        if self.last_unit_id is None or self.last_answer_id is None:
+            return None
+        return self.last_unit_id, self.last_answer_id
+
+    @cursor.setter
+    def cursor(self, value):
+        self.last_unit_id, self.last_answer_id = value or (None, None)
+
+
+class ApiToken(models.Model):
+    """
+    Bearer token for API clients. Only the SHA-256 digest of the key is
+    stored; the key itself is shown once, when the token is issued (see
+    exams.tokens).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    prefix = models.CharField(max_length=8)  # First characters of the key, to tell tokens apart
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name or self.prefix}"
+
+    def is_active(self, now=None):
+        now = now or timezone.now()
+        return self.revoked_at is None and (self.expires_at is None or self.expires_at > now)
+
+
+class Tombstone(models.Model):
+    """
+    A deleted Exam, StudentAnswer, ExamResult or StudentLedger row, kept so
+    the change feeds can tell clients to drop it (see exams.changes). The
+    owner columns copy the deleted row's to scope the feeds.
+    """
+    model = models.CharField(max_length=30)  # Model name, e.g. 'examresult'
+    object_id = models.BigIntegerField()
+    exam_id = models.BigIntegerField(null=True, blank=True)
+    student_id = models.BigIntegerField(null=True, blank=True)
+    teacher_id = models.BigIntegerField(null=True, blank=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'deleted_at', 'id'], name='tombstone_feed'),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,63 @@
+"""
+Student rosters with ledger summaries computed by the database.
+
+annotate_roster() annotates students with their exam count, average score
+and last exam date; subject_averages() adds the per-subject averages of one
+page of them with a single GROUP BY query. A page therefore costs a fixed
+number of queries (count, page, subjects), whatever the size of the
+ledgers, and no ledger row is loaded.
+"""
+from django.core.paginator import Paginator
+from django.db.models import Avg, Count, F, Max
+
+from .models import StudentLedger
+
+# ?sort= values and the columns they order by; prefix them with '-' to reverse.
+ROSTER_ORDERINGS = {
+    'name': 'user__username',
+    'grade': 'grade',
+    'exams': 'exam_count',
+    'average': 'average_score',
+    'last_exam': 'last_exam_date',
+}
+DEFAULT_ORDERING = 'name'
+PAGE_SIZE = 25
+
+
+def roster_ordering(sort):
+    """The order_by() arguments for ``sort``, falling back to the default for unknown values."""
+    name = (sort or '').lstrip('-')
+    if name not in ROSTER_ORDERINGS:
+        name, sort = DEFAULT_ORDERING, DEFAULT_ORDERING
+    column = F(ROSTER_ORDERINGS[name])
+    # Students without exams sort last either way.
+    column = column.desc(nulls_last=True) if sort.startswith('-') else column.asc(nulls_last=True)
+    return [column, 'id']
+
+
+def annotate_roster(students):
+    return (students.select_related('user')
+            .annotate(exam_count=Count('ledger_entries'),
+                      average_score=Avg('ledger_entries__score'),
+                      last_exam_date=Max('ledger_entries__date')))
+
+
+def subject_averages(students):
+    """{student id: [(subject, average score, exam count)]} for ``students``."""
+    averages = {student.id: [] for student in students}
+    rows = (StudentLedger.objects.filter(student_id__in=averages)
+            .values_list('student_id', 'subject')
+            .annotate(average=Avg('score'), exams=Count('id'))
+            .order_by('student_id', 'subject'))
+    for student_id, subject, average, exams in rows:
+        averages[student_id].append((subject, average, exams))
+    return averages
+
+
+def roster_page(students, sort=None, page=None, page_size=PAGE_SIZE):
+    """Page ``page`` of the roster of ``students``; each student gets a ``subjects`` list."""
+    page = Paginator(annotate_roster(students).order_by(*roster_ordering(sort)), page_size).get_page(page)
+    averages = subject_averages(page.object_list)
+    for student in page.object_list:
+        student.subjects = averages[student.id]
+    return page
@@ -0,0 +1,121 @@
+"""
+Automatic scoring of objective answers.
+
+An AnswerKey is built once from an exam's questions and scores a whole
+submission in memory, so answers can be inserted with their score already
+set. Answers the key cannot decide on are left with a NULL score for the
+teacher to grade by hand. A question answered by picking a choice is worth
+POINTS_PER_QUESTION; any other question is worth MANUAL_POINTS, so teachers
+can give partial credit.
+
+Normalization is configured with the EXAM_SCORING setting, e.g.::
+
+    EXAM_SCORING = {
+        'CASE_SENSITIVE': False,
+        'NORMALIZE_WHITESPACE': True,
+        'MATCH_CHOICE_INDEX': True,
+        'CHOICE_INDEX_BASE': 1,
+        'POINTS_PER_QUESTION': 1,
+        'MANUAL_POINTS': 100,
+    }
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    # Compare answers case-insensitively unless this is set.
+    'CASE_SENSITIVE': False,
+    # Strip surrounding whitespace and collapse inner runs to one space.
+    'NORMALIZE_WHITESPACE': True,
+    # Accept a choice's position ("2") as well as its text.
+    'MATCH_CHOICE_INDEX': True,
+    # Position of the first choice when MATCH_CHOICE_INDEX is on.
+    'CHOICE_INDEX_BASE': 1,
+    # Points awarded for a correct choice.
+    'POINTS_PER_QUESTION': 1,
+    # Points of a question whose correct answer is not one of its choices.
+    'MANUAL_POINTS': 100,
+}
+
+
+def scoring_options(**overrides):
+    return {**DEFAULTS, **getattr(settings, 'EXAM_SCORING', {}), **overrides}
+
+
+def question_points(question):
+    """Points ``question`` is worth: the most an answer can score, automatically or by hand."""
+    return AnswerKey([question]).points[question.id]
+
+
+def percentage(total, max_score):
+    return round(total * 100 / max_score, 2) if max_score else 0.0
+
+
+class AnswerKey:
+    """Normalized answer key for a list of questions."""
+
+    def __init__(self, questions, **options):
+        self.options = scoring_options(**options)
+        self.entries = {}
+        self.points = {}
+        for question in questions:
+            choices = question.answer_choices if isinstance(question.answer_choices, list) else []
+            choices = [self.normalize(choice) for choice in choices]
+            correct = self.normalize(question.correct_answer)
+            correct_index = self.resolve(correct, choices)
+            self.entries[question.id] = (choices, correct_index, correct)
+            scale = 'POINTS_PER_QUESTION' if correct_index is not None else 'MANUAL_POINTS'
+            self.points[question.id] = self.options[scale]
+        self.max_score = sum(self.points.values())
+
+    def normalize(self, value):
+        value = '' if value is None else str(value)
+        if self.options['NORMALIZE_WHITESPACE']:
+            value = ' '.join(value.split())
+        if not self.options['CASE_SENSITIVE']:
+            value = value.casefold()
+        return value
+
+    def resolve(self, text, choices):
+        """Return the index of the choice ``text`` refers to, or None."""
+        if text in choices:
+            return choices.index(text)
+        if self.options['MATCH_CHOICE_INDEX'] and text.isdigit():
+            index = int(text) - self.options['CHOICE_INDEX_BASE']
+            if 0 <= index < len(choices):
+                return index
+        return None
+
+    def score(self, question_id, answer):
+        """
+        Score one answer. Returns the points awarded, or None when the
+        answer has to be graded by a teacher.
+        """
+        entry = self.entries.get(question_id)
+        if entry is None:
+            return None
+        choices, correct_index, correct = entry
+        if not correct:
+            return None
+        text = self.normalize(answer)
+        if correct_index is not None:
+            given = self.resolve(text, choices)
+            if given is None:
+                return None
+            return self.points[question_id] if given == correct_index else 0
+        return self.points[question_id] if text == correct else None
+
+
+def score_answers(key, answers):
+    """
+    Set ``score`` on each unsaved StudentAnswer in ``answers``.
+    Returns (total of the scored answers, number left for manual grading).
+    """
+    total = 0
+    pending = 0
+    for answer in answers:
+        answer.score = key.score(answer.question_id, answer.answer)
+        if answer.score is None:
+            pending += 1
+        else:
+            total += answer.score
+    return total, pending
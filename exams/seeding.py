@@ -0,0 +1,122 @@
+"""
+Synthetic data for benchmarks and local load testing.
+
+Everything is written with bulk_create in large batches, and answers with
+plain INSERTs, so signal-driven tables (exam access) are rebuilt
+explicitly instead of row by row.
+"""
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .access import rebuild_all_access
+from .grading import refresh_grades
+from .models import Student, Teacher, Exam, Question, StudentAnswer
+from .scoring import AnswerKey
+
+BATCH_SIZE = 5000
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'Biology', 'History', 'Geography', 'Literature', 'English']
+CHOICES = ['A', 'B', 'C', 'D']
+
+
+def insert_answers(rows):
+    """
+    Insert (student id, question id, answer, score) rows without building
+    model instances: executemany on SQLite, where it is an in-process
+    loop, and multi-row INSERT statements on client/server databases.
+    """
+    table = connection.ops.quote_name(StudentAnswer._meta.db_table)
+    columns = ('student_id', 'question_id', 'answer', 'score', 'created_at', 'updated_at')
+    column_sql = ', '.join(connection.ops.quote_name(column) for column in columns)
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    created_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    rows = [row + (created_at, created_at) for row in rows]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(f'INSERT INTO {table} ({column_sql}) VALUES {placeholders}', rows)
+            return
+        per_statement = (connection.features.max_query_params or len(columns) * 1000) // len(columns)
+        for start in range(0, len(rows), per_statement):
+            batch = rows[start:start + per_statement]
+            values = ', '.join([placeholders] * len(batch))
+            cursor.execute(f'INSERT INTO {table} ({column_sql}) VALUES {values}',
+                           [value for row in batch for value in row])
+
+
+def seed(teachers=10, students=300, exams=20, questions=40, submission_rate=1.0, correct_rate=0.7,
+         prefix='seed', password='password', rng=None):
+    """
+    Create teachers, students, exams with multiple-choice questions, and
+    scored submissions from ``submission_rate`` of each exam's eligible
+    students. Returns the number of rows created per model.
+    """
+    rng = rng or random.Random(0)
+    grades = [grade for grade, label in Student.GRADE_CHOICES]
+    hashed = make_password(password)  # Hashed once; every seeded user shares it.
+
+    with transaction.atomic():
+        teacher_users = User.objects.bulk_create(
+            [User(username=f'{prefix}_teacher_{i}', password=hashed) for i in range(teachers)],
+            batch_size=BATCH_SIZE)
+        teacher_objs = Teacher.objects.bulk_create([Teacher(user=user) for user in teacher_users],
+                                                   batch_size=BATCH_SIZE)
+
+        student_users = User.objects.bulk_create(
+            [User(username=f'{prefix}_student_{i}', password=hashed) for i in range(students)],
+            batch_size=BATCH_SIZE)
+        student_objs = Student.objects.bulk_create(
+            [Student(user=user, grade=rng.choice(grades)) for user in student_users], batch_size=BATCH_SIZE)
+        student_teachers = {
+            student.id: {teacher.id for teacher in rng.sample(teacher_objs, rng.randint(1, min(3, teachers)))}
+            for student in student_objs
+        }
+        Student.teachers.through.objects.bulk_create(
+            [Student.teachers.through(student_id=student_id, teacher_id=teacher_id)
+             for student_id, teacher_ids in student_teachers.items() for teacher_id in teacher_ids],
+            batch_size=BATCH_SIZE)
+
+        exam_objs = Exam.objects.bulk_create([
+            Exam(title=f'{prefix} exam {i}', subject=rng.choice(SUBJECTS), teacher=rng.choice(teacher_objs),
+                 grade=rng.choice(grades), description='Generated exam', instructions='Answer every question.',
+                 question_count=questions)
+            for i in range(exams)
+        ], batch_size=BATCH_SIZE)
+        question_objs = Question.objects.bulk_create([
+            Question(exam=exam, question_text=f'{exam.title}, question {i}', correct_answer=rng.choice(CHOICES),
+                     answer_choices=CHOICES)
+            for exam in exam_objs for i in range(questions)
+        ], batch_size=BATCH_SIZE)
+        rebuild_all_access()
+
+        exam_questions = {}
+        for question in question_objs:
+            exam_questions.setdefault(question.exam_id, []).append(question)
+        answer_count = 0
+        for exam in exam_objs:
+            questions_of_exam = exam_questions.get(exam.id, [])
+            key = AnswerKey(questions_of_exam)
+            scores = {(question.id, choice): key.score(question.id, choice)
+                      for question in questions_of_exam for choice in CHOICES}
+            rows = []
+            for student in student_objs:
+                if student.grade != exam.grade or exam.teacher_id not in student_teachers[student.id]:
+                    continue
+                if rng.random() >= submission_rate:
+                    continue
+                for question in questions_of_exam:
+                    choice = question.correct_answer if rng.random() < correct_rate else rng.choice(CHOICES)
+                    rows.append((student.id, question.id, choice, scores[question.id, choice]))
+            insert_answers(rows)
+            answer_count += len(rows)
+            refresh_grades(exam, max_score=key.max_score)
+
+    return {
+        'teachers': len(teacher_objs),
+        'students': len(student_objs),
+        'exams': len(exam_objs),
+        'questions': len(question_objs),
+        'answers': answer_count,
+    }
@@ -0,0 +1,79 @@
+"""
+Steps of accepting an exam submission, shared by the sync and async
+take_exam views.
+"""
+import logging
+
+from django.db import IntegrityError, transaction
+from django.forms import modelformset_factory
+from django.utils import timezone
+
+from .forms import StudentAnswerForm
+from .grading import save_totals
+from .models import ExamAttempt, StudentAnswer
+from .scoring import AnswerKey, score_answers
+
+logger = logging.getLogger(__name__)
+
+
+def answer_formset(questions):
+    """Formset class with exactly one answer form per question."""
+    return modelformset_factory(StudentAnswer, form=StudentAnswerForm, extra=0,
+                                min_num=len(questions), max_num=len(questions),
+                                validate_min=True, validate_max=True, can_delete=False)
+
+
+def start_attempt(exam, student, create=True):
+    """
+    The student's attempt at ``exam``, started now if this is the first
+    time they open it. Without ``create`` a new attempt is left unsaved
+    for submit_answers() to insert.
+    """
+    if create:
+        attempt, _ = ExamAttempt.objects.get_or_create(student=student, exam=exam)
+        return attempt
+    return ExamAttempt.objects.filter(student=student, exam=exam).first() or ExamAttempt(student=student, exam=exam)
+
+
+def build_answers(formset, questions, attempt):
+    answers = []
+    for form, question in zip(formset, questions):
+        answer = form.save(commit=False)
+        answer.student_id = attempt.student_id
+        answer.question = question
+        answer.attempt = attempt
+        answers.append(answer)
+    return answers
+
+
+def submit_answers(exam, attempt, answers, questions):
+    """
+    Score ``answers`` against ``questions`` and store them with the
+    student's result in one transaction, closing ``attempt``. Returns
+    False when a concurrent submit of the same attempt already did.
+    """
+    key = AnswerKey(questions)
+    total, pending = score_answers(key, answers)
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            # Claiming the attempt serializes concurrent submits of it.
+            status = ExamAttempt.SUBMITTED if pending else ExamAttempt.GRADED
+            if attempt.pk is None:
+                attempt.status, attempt.submitted_at = status, now
+                attempt.save(force_insert=True)
+                claimed = True
+            else:
+                claimed = ExamAttempt.objects.filter(pk=attempt.pk, status=ExamAttempt.STARTED).update(
+                    status=status, submitted_at=now)
+            if claimed:
+                StudentAnswer.objects.bulk_create(answers)
+                # The ledger only receives the mark once nothing is left to grade by hand.
+                results = save_totals(exam, {attempt.student_id: total}, max_score=key.max_score, ledger=not pending,
+                                      times={attempt.student_id: now - attempt.started_at}, graded=0 if pending else 1)
+                ExamAttempt.objects.filter(pk=attempt.pk).update(result_id=results[attempt.student_id])
+    except IntegrityError:
+        claimed = False
+    if not claimed:
+        logger.info(f"Duplicate submission of exam {exam.id} by student {attempt.student_id} ignored")
+    return bool(claimed)
@@ -6,3 +6,9 @@ register = template.Library()
 @register.filter
 def zip_lists(a, b):
     return zip(a, b)
+
+
+@register.filter
+def toggle_sort(current, column):
+    """The ?sort= value of a column header: ascending first, descending when already sorted by it."""
+    return f'-{column}' if current == column else column
@@ -0,0 +1,194 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .instrumentation import query_budget
+from .management.commands.check_query_plans import FULL_SCAN, seeded_plans
+from .models import Teacher, Student, Exam, Question, StudentAnswer, ExamResult
+
+
+# The manifest only exists after collectstatic.
+@override_settings(STORAGES={**settings.STORAGES,
+                             'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+class ExamTestCase(TestCase):
+    """An exam of ``questions`` choice questions, open to ``students`` students."""
+    questions = 10
+    students = 3
+
+    def setUp(self):
+        cache.clear()
+        self.teacher_user = User.objects.create_user('teacher')
+        self.teacher = Teacher.objects.create(user=self.teacher_user)
+        self.exam = Exam.objects.create(title='Algebra', subject='Math', teacher=self.teacher, grade=10)
+        self.question_list = [
+            Question.objects.create(exam=self.exam, question_text=f'Question {i}', correct_answer='a',
+                                    answer_choices=['a', 'b', 'c'])
+            for i in range(self.questions)
+        ]
+        self.student_list = []
+        for i in range(self.students):
+            student = Student.objects.create(user=User.objects.create_user(f'student{i}'), grade=10)
+            student.teachers.add(self.teacher)
+            self.student_list.append(student)
+
+    def submission(self, answer='a'):
+        data = {'form-TOTAL_FORMS': self.questions, 'form-INITIAL_FORMS': 0}
+        data.update({f'form-{i}-answer': answer for i in range(self.questions)})
+        return data
+
+
+class QueryBudgetTests(ExamTestCase):
+    """The budgeted views stay within QUERY_BUDGETS."""
+
+    def budget(self, view_name):
+        return query_budget(settings.QUERY_BUDGETS[view_name], view_name)
+
+    def test_take_exam(self):
+        url = reverse('take_exam', args=[self.exam.id])
+        first, second = self.student_list[:2]
+        self.client.force_login(first.user)
+        with self.budget('take_exam'):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with self.budget('take_exam'):
+            self.assertRedirects(self.client.post(url, self.submission()), reverse('exam_submitted'),
+                                 fetch_redirect_response=False)
+        # Submitted without opening the exam first.
+        self.client.force_login(second.user)
+        with self.budget('take_exam'):
+            self.assertEqual(self.client.post(url, self.submission()).status_code, 302)
+        self.assertEqual(StudentAnswer.objects.filter(student=second).count(), self.questions)
+
+    def test_grade_exam(self):
+        for student in self.student_list:
+            StudentAnswer.objects.bulk_create([StudentAnswer(student=student, question=question, answer='x')
+                                               for question in self.question_list])
+        url = reverse('grade_exam', args=[self.exam.id])
+        self.client.force_login(self.teacher_user)
+        with self.budget('grade_exam'):
+            page = self.client.get(url)
+        scores = {f'score_{answer.id}': 1 for answer in page.context['student_answers']}
+        with self.budget('grade_exam'):
+            self.assertEqual(self.client.post(url, scores).status_code, 302)
+        self.exam.refresh_from_db()
+        self.assertEqual(self.exam.graded_count, self.students)
+
+    def test_exam_detail(self):
+        self.client.force_login(self.teacher_user)
+        with self.budget('exam_detail'):
+            self.assertEqual(self.client.get(reverse('exam_detail', args=[self.exam.id])).status_code, 200)
+
+    def test_export_data(self):
+        for student in self.student_list:
+            self.client.force_login(student.user)
+            self.client.post(reverse('take_exam', args=[self.exam.id]), self.submission())
+        self.client.force_login(self.teacher_user)
+        for kind in ('results', 'ledger', 'answers'):
+            with self.budget('export_data'):
+                response = self.client.get(reverse('export_data', args=[kind]))
+                rows = b''.join(response.streaming_content).splitlines()
+            self.assertGreater(len(rows), self.students)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        if connection.vendor not in FULL_SCAN:
+            self.skipTest(f'Query plans cannot be checked on {connection.vendor}.')
+        self.assertEqual([name for name, plan, full_scan in seeded_plans() if full_scan], [])
+
+
+class ApiWriteTests(ExamTestCase):
+    """Students read their own rows through the API; only staff write."""
+
+    def setUp(self):
+        super().setUp()
+        self.student = self.student_list[0]
+        self.client.force_login(self.student.user)
+        self.client.post(reverse('take_exam', args=[self.exam.id]), self.submission('b'))
+        self.answer = StudentAnswer.objects.filter(student=self.student).first()
+        self.result = ExamResult.objects.get(student=self.student, exam=self.exam)
+        self.api = APIClient()
+        self.api.force_authenticate(self.student.user)
+
+    def test_student_cannot_score_themselves(self):
+        response = self.api.patch(f'/api/student-answers/{self.answer.id}/', {'score': 1}, format='json')
+        self.assertEqual(response.status_code, 403)
+        response = self.api.patch(f'/api/exam-results/{self.result.id}/', {'total_score': 99}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.answer.refresh_from_db()
+        self.result.refresh_from_db()
+        self.assertEqual((self.answer.score, self.result.total_score), (0, 0))
+
+    def test_student_cannot_change_exams(self):
+        response = self.api.patch(f'/api/exams/{self.exam.id}/', {'title': 'Renamed'}, format='json')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.api.delete(f'/api/exams/{self.exam.id}/').status_code, 403)
+        self.assertTrue(Exam.objects.filter(id=self.exam.id, title='Algebra').exists())
+
+    def test_student_reads_own_rows(self):
+        self.assertEqual(self.api.get(f'/api/student-answers/{self.answer.id}/').status_code, 200)
+        self.assertEqual(self.api.get(f'/api/exam-results/{self.result.id}/').status_code, 200)
+
+    def test_teacher_grades(self):
+        self.api.force_authenticate(self.teacher_user)
+        response = self.api.patch(f'/api/student-answers/{self.answer.id}/', {'score': 1}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.result.refresh_from_db()
+        self.assertEqual((self.result.total_score, self.result.percentage), (1, 10.0))
+        response = self.api.patch(f'/api/exam-results/{self.result.id}/', {'total_score': 99}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ExamWindowTests(ExamTestCase):
+    """Students see a timed exam and its questions through the API only while it is open."""
+
+    def setUp(self):
+        super().setUp()
+        self.api = APIClient()
+        self.api.force_authenticate(self.student_list[0].user)
+
+    def schedule(self, start, end):
+        self.exam.is_timed, self.exam.start_datetime, self.exam.end_datetime = True, start, end
+        self.exam.duration_minutes = 30
+        self.exam.save()
+
+    def statuses(self):
+        return [self.api.get(url).status_code for url in (
+            f'/api/exams/{self.exam.id}/',
+            f'/api/exams/{self.exam.id}/questions/',
+            f'/api/exams/{self.exam.id}/bundle/',
+            f'/api/questions/{self.question_list[0].id}/',
+        )]
+
+    def listed_questions(self):
+        return self.api.get('/api/questions/').json()['count']
+
+    def test_before_and_after_the_window(self):
+        now = timezone.now()
+        for start, end in [(now + timedelta(hours=1), now + timedelta(hours=2)),
+                           (now - timedelta(hours=2), now - timedelta(hours=1))]:
+            self.schedule(start, end)
+            self.assertEqual(self.statuses(), [403, 403, 403, 404])
+            self.assertEqual(self.listed_questions(), 0)
+
+    def test_open_window(self):
+        now = timezone.now()
+        self.schedule(now - timedelta(minutes=5), now + timedelta(hours=1))
+        self.assertEqual(self.statuses(), [200, 200, 200, 200])
+        self.assertEqual(self.listed_questions(), self.questions)
+
+    def test_teacher_before_the_window(self):
+        now = timezone.now()
+        self.schedule(now + timedelta(hours=1), now + timedelta(hours=2))
+        self.api.force_authenticate(self.teacher_user)
+        self.assertEqual(self.statuses(), [200, 200, 200, 200])
+
+    def test_other_exam(self):
+        other = Exam.objects.create(title='Other', subject='Math', teacher=None, grade=10)
+        self.assertEqual(self.api.get(f'/api/exams/{other.id}/').status_code, 404)
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path, include
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('', views.home, name='home'),
@@ -29,11 +30,16 @@ urlpatterns = [
     path('teacher/<int:teacher_id>/exams/', views.teacher_exams, name='teacher_exams'),
     path('teacher/list/', views.teacher_list, name='teacher_list'),
     path('student/exams/', views.student_exams, name='student_exams'),
-    path('exam/<int:exam_id>/take/', views.take_exam, name='take_exam'),
+    path('exam/<int:exam_id>/take/', async_views.take_exam if settings.ASGI else views.take_exam, name='take_exam'),
+    # Both implementations under fixed URLs, for load comparisons (scripts/load_test.py)
+    path('exam/<int:exam_id>/take/sync/', views.take_exam, name='take_exam_sync'),
+    path('exam/<int:exam_id>/take/async/', async_views.take_exam, name='take_exam_async'),
     path('exam/submitted/', views.exam_submitted, name='exam_submitted'),
     path('exam/already_taken/', views.exam_already_taken, name='exam_already_taken'),
     path('exam/<int:exam_id>/answers/', views.view_student_answers, name='view_student_answers'),
     path('exam/<int:exam_id>/grade/', views.grade_exam, name='grade_exam'),
+    path('exam/<int:exam_id>/analytics/', views.exam_analytics, name='exam_analytics'),
     path('teacher/accessible_students/', views.accessible_students, name='accessible_students'),
     path('teacher/student_ledger/<int:student_id>/', views.view_student_ledger, name='view_student_ledger'),
+    path('export/<str:kind>/', views.export_data, name='export_data'),
 ]
@@ -1,3 +1,4 @@
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login as auth_login, logout, update_session_auth_hash
 from django.contrib import messages
@@ -5,12 +6,22 @@ from django.contrib.auth.decorators import user_passes_test, login_required
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import PasswordChangeForm
 from django.core.paginator import Paginator
-from django.db.models import Q
-from django.forms import modelformset_factory
+from django.db.models import Count, Prefetch, Q
 from .forms import StudentCreationForm, TeacherCreationForm, ChangeUserPasswordForm, ExamForm, QuestionForm, StudentForm
-from .forms import LoginForm, StudentAnswerForm, GradeForm
-from .models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger
+from .forms import LoginForm, GradeForm
+from .models import Student, Teacher, Exam, Question, StudentAnswer, ExamResult, StudentLedger, GradingProgress
+from .models import ExamAttempt
+from .analytics import exam_analytics as exam_analytics_data
+from .caching import exam_questions
+from .exports import EXPORTS, FORMATS, stream_export
+from .grading import GRADING_UNITS, apply_scores, format_cursor, grading_page, parse_cursor
+from .roster import DEFAULT_ORDERING, PAGE_SIZE as ROSTER_PAGE_SIZE, roster_page
+from .scoring import AnswerKey
+from .submission import answer_formset, build_answers, start_attempt, submit_answers
+from django.urls import reverse
 from django.utils import timezone
+from itertools import groupby
+from urllib.parse import urlencode
 import logging
 
 logger = logging.getLogger(__name__)
@@ -281,7 +292,7 @@ def exam_success(request):
 def student_homepage(request):
     if hasattr(request.user, 'student'):
         student = request.user.student
-        exams = student.get_accessible_exams()
+        exams = student.get_open_exams().select_related('teacher__user')
         return render(request, 'exams/student/homepage.html', {'exams': exams})
     else:
         return redirect('home')
@@ -341,7 +352,7 @@ def exam_detail(request, exam_id):
     exam = get_exam_for_user(request, exam_id)
     context = {
         'exam': exam,
-        'questions': exam.questions.all(),  # Assuming related_name is 'questions'
+        'questions': exam_questions(exam, with_key=True),
     }
     return render(request, 'exams/exam_detail.html', context)
 
@@ -401,7 +412,7 @@ def teacher_exams(request, teacher_id):
 def student_exams(request):
     if hasattr(request.user, 'student'):
         student = request.user.student
-        exams = student.get_accessible_exams()
+        exams = student.get_open_exams().select_related('teacher__user')
         return render(request, 'exams/student_exams.html', {'exams': exams})
     else:
         return redirect('home')
@@ -411,44 +422,26 @@ def student_exams(request):
 def take_exam(request, exam_id):
     if hasattr(request.user, 'student'):
         student = request.user.student
-        exam = get_object_or_404(Exam, id=exam_id, grade=student.grade, teacher__in=student.teachers.all())
+        # Outside a timed exam's window there is nothing to take or submit.
+        exam = get_object_or_404(student.get_open_exams().select_related('teacher__user'), id=exam_id)
 
-        # Check if the student has already taken the exam
-        if StudentAnswer.objects.filter(student=student, question__exam=exam).exists():
-            return redirect('exam_already_taken')
+        # Check if the student has already taken the exam; a repeated submit lands on the result page.
+        attempt = start_attempt(exam, student, create=request.method != 'POST')
+        if attempt.status != ExamAttempt.STARTED:
+            return redirect('exam_submitted' if request.method == 'POST' else 'exam_already_taken')
 
-        # Create a formset for the student's answers
-        StudentAnswerFormSet = modelformset_factory(StudentAnswer, form=StudentAnswerForm,
-                                                    extra=len(exam.questions.all()), can_delete=False)
+        # Only a submission needs the answer key.
+        questions = exam_questions(exam, with_key=request.method == 'POST')
+        StudentAnswerFormSet = answer_formset(questions)
 
         if request.method == 'POST':
-            formset = StudentAnswerFormSet(request.POST)
+            # Never bound to existing answers, whatever INITIAL_FORMS says.
+            formset = StudentAnswerFormSet(request.POST, queryset=StudentAnswer.objects.none())
             if formset.is_valid():
-                for form, question in zip(formset, exam.questions.all()):
-                    answer = form.save(commit=False)
-                    answer.student = student
-                    answer.question = question
-                    answer.save()
+                submit_answers(exam, attempt, build_answers(formset, questions, attempt), questions)
                 return redirect('exam_submitted')
         else:
-            questions = exam.questions.all()
-
-            # Debug: Print questions
-            for question in questions:
-                print(f"Question: {question.question_text}")
-
-            initial_data = [{'question': q.id, 'student': student.id} for q in questions]
-            print(f"Initial Data: {initial_data}")
-            formset = StudentAnswerFormSet(queryset=StudentAnswer.objects.none(), initial=initial_data)
-
-            # Debug: Print formset data
-            for form in formset:
-                print(f"Form: {form.initial}")
-
-        # Debug: Print context variables
-        print(f"Context - Exam: {exam}")
-        print(f"Context - Formset: {formset.management_form}")
-        print(f"Context - Questions: {questions}")
+            formset = StudentAnswerFormSet(queryset=StudentAnswer.objects.none())
 
         return render(request, 'exams/student/take_exam.html', {
             'exam': exam,
@@ -461,17 +454,18 @@ def take_exam(request, exam_id):
 
 @login_required
 def exam_submitted(request):
-    # Get the most recent exam result for the current student
+    # Get the most recently submitted attempt of the current student
     student = get_object_or_404(Student, user=request.user)
-    latest_result = ExamResult.objects.filter(student=student).order_by('-completed_at').first()
-    
-    if not latest_result:
+    attempt = (ExamAttempt.objects.filter(student=student, submitted_at__isnull=False)
+               .select_related('exam', 'result').order_by('-submitted_at').first())
+
+    if not attempt or not attempt.result:
         return redirect('student_homepage')
-    
+
     context = {
-        'exam': latest_result.exam,
-        'result': latest_result,
-        'answers': StudentAnswer.objects.filter(exam_result=latest_result).select_related('question')
+        'exam': attempt.exam,
+        'result': attempt.result,
+        'answers': attempt.answers.select_related('question')
     }
     return render(request, 'exams/student/exam_submitted.html', context)
 
@@ -489,77 +483,80 @@ def view_student_answers(request, exam_id):
     return render(request, 'exams/view_student_answers.html', {'exam': exam, 'student_answers': student_answers})
 
 
+@login_required
+@user_passes_test(lambda u: hasattr(u, 'teacher'))
+def exam_analytics(request, exam_id):
+    exam = get_object_or_404(Exam, id=exam_id, teacher=request.user.teacher)
+    return render(request, 'exams/exam_analytics.html', {'exam': exam, 'stats': exam_analytics_data(exam)})
+
+
+def grading_url(exam, by, cursor, show_all):
+    params = {'by': by, 'after': format_cursor(cursor) if cursor else ''}
+    if show_all:
+        params['all'] = '1'
+    return f"{reverse('grade_exam', args=[exam.id])}?{urlencode(params)}"
+
+
 @login_required
 @superuser_or_teacher_required
 def grade_exam(request, exam_id):
-    exam = get_object_or_404(Exam, id=exam_id, teacher=request.user.teacher)
-    student_answers = StudentAnswer.objects.filter(question__exam=exam).select_related('student')
+    exam = get_object_or_404(Exam.objects.select_related('teacher__user'), id=exam_id, teacher=request.user.teacher)
+    # Answers the scoring engine already marked only need a teacher when re-grading.
+    show_all = request.GET.get('all') == '1'
+    progress, _ = GradingProgress.objects.get_or_create(exam=exam, teacher=request.user.teacher)
+    by = request.GET.get('by', progress.mode)
+    if by not in GRADING_UNITS:
+        by = 'student'
+    if 'after' in request.GET:
+        after = parse_cursor(request.GET['after'])
+    else:
+        # Resume where this teacher stopped last time.
+        after = progress.cursor if progress.mode == by else None
+
+    student_answers, cursor, has_more = grading_page(exam, by, after, pending_only=not show_all)
+    if not student_answers and after:
+        # Nothing left past the cursor; start over to pick up anything skipped.
+        student_answers, cursor, has_more = grading_page(exam, by, None, pending_only=not show_all)
 
     if request.method == 'POST':
         form = GradeForm(request.POST, student_answers=student_answers)
         if form.is_valid():
-            total_scores = {}
-            print("Starting to process student answers...")  # Debugging print statement
-
-            # Save scores
-            for answer in student_answers:
-                score = form.cleaned_data.get(f'score_{answer.id}')
-                print(
-                    f"Processing answer ID: {answer.id}, student: {answer.student.user.username}, score: {score}")  # Debugging
-                answer.score = score
-                answer.save()
-                if answer.student.id not in total_scores:
-                    total_scores[answer.student.id] = 0
-                total_scores[answer.student.id] += score
-                print(
-                    f"Updated total_scores for student ID {answer.student.id}: {total_scores[answer.student.id]}")  # Debugging
-
-            # Save total scores in ExamResult and StudentLedger
-            for student_id, total_score in total_scores.items():
-                student = get_object_or_404(Student, id=student_id)
-                print(f"Processing total score for student ID: {student_id}, total score: {total_score}")  # Debugging
-
-                # Save or update ExamResult
-                exam_result, created = ExamResult.objects.get_or_create(student=student, exam=exam)
-                print(
-                    f"ExamResult {'created' if created else 'updated'} for student ID {student_id}, exam ID {exam.id}")  # Debugging
-                exam_result.total_score = total_score
-                exam_result.save()
-
-                # Save the total score in StudentLedger
-                ledger_entries = StudentLedger.objects.filter(student=student, exam=exam)
-                print(
-                    f"Ledger entries found for student ID {student_id}, exam ID {exam.id}: {ledger_entries.count()}")  # Debugging
-
-                if ledger_entries.exists():
-                    ledger_entry = ledger_entries.first()
-                    print(f"Updating existing ledger entry for student ID {student_id}, exam ID {exam.id}")  # Debugging
-                    ledger_entry.score = total_score
-                    ledger_entry.teacher_name = exam.teacher.user.username if exam.teacher else ledger_entry.teacher_name
-                    ledger_entry.save()
-                else:
-                    print(f"Creating new ledger entry for student ID {student_id}, exam ID {exam.id}")  # Debugging
-                    StudentLedger.objects.create(
-                        student=student,
-                        exam=exam,
-                        subject=exam.subject,
-                        date=exam.created_at,  # Use the exam creation date
-                        score=total_score,
-                        teacher_name=exam.teacher.user.username if exam.teacher else "Unknown"
-                    )
-
+            scores = {answer.id: form.cleaned_data.get(f'score_{answer.id}') for answer in student_answers}
+            apply_scores(exam, student_answers, scores)
+            progress.mode = by
+            progress.cursor = cursor if has_more else None
+            progress.save()
             messages.success(request, 'Scores saved successfully!')
+            if has_more:
+                return redirect(grading_url(exam, by, cursor, show_all))
             return redirect('view_student_answers', exam_id=exam.id)
     else:
         form = GradeForm(student_answers=student_answers)
-    return render(request, 'exams/grade_exam.html', {'exam': exam, 'student_answers': student_answers, 'form': form})
+
+    points = AnswerKey({answer.question for answer in student_answers}).points
+    if by == 'student':
+        units = groupby(student_answers, key=lambda answer: answer.student.user.username)
+    else:
+        units = groupby(student_answers, key=lambda answer: answer.question.question_text)
+    return render(request, 'exams/grade_exam.html', {
+        'exam': exam,
+        'student_answers': student_answers,
+        'units': [(label, [(answer, points[answer.question_id]) for answer in answers]) for label, answers in units],
+        'form': form,
+        'by': by,
+        'show_all': show_all,
+        'next_url': grading_url(exam, by, cursor, show_all) if has_more else None,
+        'progress': StudentAnswer.objects.filter(question__exam=exam).aggregate(
+            total=Count('id'), graded=Count('score')),
+        'ungraded_attempts': exam.attempts.filter(status=ExamAttempt.SUBMITTED).count(),
+    })
 
 
 @login_required
 def student_homepage(request):
     if hasattr(request.user, 'student'):
         student = request.user.student
-        exams = student.get_accessible_exams()
+        exams = student.get_open_exams().select_related('teacher__user')
         exam_results = ExamResult.objects.filter(student=student)
         ledger_entries = StudentLedger.objects.filter(student=student)
         return render(request, 'exams/student/homepage.html', {
@@ -579,8 +576,10 @@ def accessible_students(request):
     if hasattr(request.user, 'teacher'):
         teacher = request.user.teacher
         students = Student.objects.filter(teachers=teacher)  # Students assigned to this teacher
+        sort = request.GET.get('sort', DEFAULT_ORDERING)
         return render(request, 'exams/teacher/accessible_students.html', {
-            'students': students,
+            'students': roster_page(students, sort, request.GET.get('page')),
+            'sort': sort,
         })
     else:
         return redirect('home')
@@ -606,6 +605,36 @@ def view_student_ledger(request, student_id):
 
 @login_required
 def student_list(request):
-    # Fetch students, sorted by grade and username, with ledger_entries preloaded
-    students = Student.objects.prefetch_related('ledger_entries').order_by('grade', 'user__username')
-    return render(request, 'exams/student/student_list.html', {'students': students})
+    # One page of students, sorted by grade and username, with the ledger entries of that page only
+    students = (Student.objects.select_related('user')
+                .prefetch_related('teachers__user',
+                                  Prefetch('ledger_entries', StudentLedger.objects.select_related('exam')))
+                .order_by('grade', 'user__username'))
+    page = Paginator(students, ROSTER_PAGE_SIZE).get_page(request.GET.get('page'))
+    return render(request, 'exams/student/student_list.html', {'students': page})
+
+
+@login_required
+@superuser_or_teacher_required
+def export_data(request, kind):
+    """
+    Streams an export as CSV or JSON Lines. Teachers only get rows of
+    their own exams.
+    """
+    if kind not in EXPORTS:
+        raise Http404
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest('Unknown export format.')
+
+    filters = {name: request.GET.get(name) for name in ('exam', 'teacher', 'grade', 'since', 'until')}
+    if not request.user.is_superuser:
+        filters['teacher'] = request.user.teacher.id
+    try:
+        lines = stream_export(kind, export_format, **filters)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(lines, content_type=FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{export_format}"'
+    return response
@@ -1,5 +1,11 @@
 """
 ASGI config for exams project.
+
+Serve it with an ASGI server, e.g.
+gunicorn project_exams.asgi:application -k uvicorn.workers.UvicornWorker
+
+Static files are served by WhiteNoise's middleware, as under WSGI (see
+project_exams/static.py); run collectstatic first.
 """
 
 import os
@@ -7,5 +13,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project_exams.settings')
+os.environ.setdefault('DJANGO_ASGI', 'True')
 
-application = get_asgi_application() 
\ No newline at end of file
+application = get_asgi_application()
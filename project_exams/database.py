@@ -0,0 +1,92 @@
+"""
+Database profiles, picked with the DATABASE_PROFILE environment variable:
+
+sqlite        (default) SQLite with Django's default settings, for development.
+sqlite-tuned  SQLite for a single server: WAL journaling so readers do not
+              block the writer, a busy timeout instead of immediate "database
+              is locked" errors, write transactions that take the lock up
+              front, and the pragmas in SQLITE_PRAGMAS on every connection.
+postgres      PostgreSQL from the POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD,
+              POSTGRES_HOST and POSTGRES_PORT variables. Each process keeps a
+              psycopg connection pool (DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE
+              connections, checked before use); with DB_POOL=False it keeps
+              persistent connections for DB_CONN_MAX_AGE seconds with health
+              checks instead, e.g. behind PgBouncer. Statements give up
+              waiting for a lock after POSTGRES_LOCK_TIMEOUT.
+
+lock_timeout() bounds how long a write can wait for a lock under each
+profile; the change feeds hold rows back for longer than that (see
+CHANGE_FEED_SETTLE in settings.py).
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('sqlite', 'sqlite-tuned', 'postgres')
+SQLITE_BUSY_TIMEOUT = 20  # Seconds a connection waits for the write lock
+SQLITE_DEFAULT_TIMEOUT = 5  # The sqlite3 module's own busy timeout, in seconds
+POSTGRES_LOCK_TIMEOUT = 20  # Seconds a statement waits for a row or table lock
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Durable at checkpoints; safe from corruption with WAL
+    'cache_size': -64000,  # KiB
+    'temp_store': 'MEMORY',
+    'mmap_size': 256 * 1024 * 1024,
+}
+
+
+def sqlite_database(path, tuned=False):
+    database = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+    }
+    if tuned:
+        database['OPTIONS'] = {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': ''.join(f'PRAGMA {name}={value};' for name, value in SQLITE_PRAGMAS.items()),
+        }
+        database['CONN_MAX_AGE'] = None
+    return database
+
+
+def postgres_database(env):
+    database = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': env.get('POSTGRES_DB', 'exams'),
+        'USER': env.get('POSTGRES_USER', 'exams'),
+        'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+        'HOST': env.get('POSTGRES_HOST', 'localhost'),
+        'PORT': env.get('POSTGRES_PORT', '5432'),
+        'CONN_HEALTH_CHECKS': True,  # Pooled or persistent, connections are checked before use
+        'OPTIONS': {
+            'options': f'-c lock_timeout={POSTGRES_LOCK_TIMEOUT * 1000}',
+        },
+    }
+    if env.get('DB_POOL', 'True') == 'True':
+        # Django's pool replaces persistent connections (CONN_MAX_AGE must stay 0).
+        database['OPTIONS']['pool'] = {
+            'min_size': int(env.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(env.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': 10,
+        }
+    else:
+        database['CONN_MAX_AGE'] = int(env.get('DB_CONN_MAX_AGE', 60))
+    return database
+
+
+def lock_timeout(database):
+    """Longest a write to ``database`` (a DATABASES entry) waits for a lock, in seconds."""
+    if database['ENGINE'] == 'django.db.backends.postgresql':
+        return POSTGRES_LOCK_TIMEOUT
+    return database.get('OPTIONS', {}).get('timeout', SQLITE_DEFAULT_TIMEOUT)
+
+
+def database_config(base_dir, env=os.environ):
+    """The default database of the profile selected by ``env``."""
+    profile = env.get('DATABASE_PROFILE', 'sqlite')
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(f"Unknown DATABASE_PROFILE '{profile}', expected one of {', '.join(PROFILES)}")
+    if profile == 'postgres':
+        return postgres_database(env)
+    return sqlite_database(env.get('SQLITE_PATH', base_dir / 'db.sqlite3'), tuned=profile == 'sqlite-tuned')
@@ -2,6 +2,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from .database import database_config, lock_timeout
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -27,7 +29,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise middleware
+    'project_exams.static.AsyncWhiteNoiseMiddleware',  # WhiteNoise, under WSGI and ASGI
+    'exams.instrumentation.QueryBudgetMiddleware',  # Per-request query counts and budgets
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -36,6 +39,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Set by project_exams/asgi.py when served by an ASGI server (see README)
+ASGI = os.environ.get('DJANGO_ASGI') == 'True'
+
 ROOT_URLCONF = 'project_exams.urls'
 
 TEMPLATES = [  # Corrected key
@@ -60,12 +66,9 @@ TEMPLATES = [  # Corrected key
 
 WSGI_APPLICATION = 'project_exams.wsgi.application'
 
-# Database
+# Database, selected with DATABASE_PROFILE (see project_exams/database.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
 # Password validation
@@ -97,8 +100,11 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
 
-# Simplified static file serving with whitenoise
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Simplified static file serving with whitenoise (STATICFILES_STORAGE is no longer read by Django 5.1)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -114,12 +120,45 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        'exams.api.authentication.HashedTokenAuthentication',
+        # Hashes the password on every request; scripts should get a token from /api/tokens/.
         'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
+# Without REDIS_URL every process has its own in-memory cache, so exam bundle
+# build locks and `manage.py prewarm_bundles` only help within one process.
+# Cached data is never stale either way: its versions are read from the exam
+# rows (see exams/caching.py).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+
+# Seconds the change feeds (see exams/api/feed.py) hold recent rows back. A row's
+# updated_at is taken before its write waits for a lock and commits, so this must
+# exceed the longest lock wait plus the work of any transaction writing such rows.
+CHANGE_FEED_SETTLE = lock_timeout(DATABASES['default']) + 5
+
+# Maximum number of SQL queries per request, keyed by URL name (see exams/urls.py)
+QUERY_BUDGETS = {
+    'take_exam': 15,
+    'take_exam_sync': 15,
+    'take_exam_async': 15,
+    'exam_submitted': 10,
+    'exam_detail': 10,
+    'grade_exam': 20,
+    'view_student_ledger': 12,
+    'export_data': 10,
+}
+# Raise instead of logging when a budget is exceeded (enable in tests)
+QUERY_BUDGETS_ENFORCE = os.environ.get('QUERY_BUDGETS_ENFORCE') == 'True'
+
 '''LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -0,0 +1,37 @@
+"""
+Static file serving with WhiteNoise under both WSGI and ASGI.
+
+WhiteNoiseMiddleware is sync-only, so under ASGI Django would run it, and
+every view after it, in a thread. AsyncWhiteNoiseMiddleware serves from the
+same file table on both paths: STATIC_ROOT after collectstatic, with the
+compressed variants and far-future cache headers of the manifest's hashed
+names. Django's ASGIStaticFilesHandler is no substitute: it serves the
+unhashed source files through the finders, so with DEBUG off every
+{% static %} URL would 404.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,165 @@
+"""
+Load test of the exam-taking endpoint with many concurrent students.
+
+Logs in seeded students (see `manage.py seed_data`; they share one
+password), finds an exam each of them may take on their homepage, then
+lets every client load it repeatedly (--mode load) or submit it once
+(--mode submit, which needs students seeded with --submission-rate 0) and
+reports throughput and latency percentiles. Run it
+against the sync and async implementations on the same server and worker
+count to compare them:
+
+    python scripts/load_test.py --base-url http://127.0.0.1:8000 --clients 100 --variant sync async
+
+--trickle-ms sends each request in small chunks with a pause between them,
+like a phone on a poor connection, which keeps a sync worker busy for the
+whole upload. Only the standard library is used.
+"""
+import argparse
+import http.client
+import re
+import socket
+import statistics
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+TIMEOUT = 120
+TRICKLE_CHUNK = 256
+CSRF_FIELD = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+TOTAL_FORMS = re.compile(r'name="form-TOTAL_FORMS" value="(\d+)"')
+EXAM_LINK = re.compile(r'href="/exam/(\d+)/take/"')
+VARIANT_PATHS = {
+    'default': '/exam/{}/take/',
+    'sync': '/exam/{}/take/sync/',
+    'async': '/exam/{}/take/async/',
+}
+
+
+def request(base, method, path, cookies, fields=None, trickle=0.0):
+    """Send one request on a new connection; returns (status, body) and stores any cookies set."""
+    body = urlencode(fields).encode() if fields is not None else b''
+    lines = [f'{method} {path} HTTP/1.1', f'Host: {base.netloc}', 'Connection: close']
+    if cookies:
+        lines.append('Cookie: ' + '; '.join(f'{name}={value}' for name, value in cookies.items()))
+    if fields is not None:
+        lines += ['Content-Type: application/x-www-form-urlencoded', f'Content-Length: {len(body)}']
+    data = ('\r\n'.join(lines) + '\r\n\r\n').encode() + body
+
+    sock = socket.create_connection((base.hostname, base.port or 80), timeout=TIMEOUT)
+    try:
+        if trickle:
+            for start in range(0, len(data), TRICKLE_CHUNK):
+                sock.sendall(data[start:start + TRICKLE_CHUNK])
+                time.sleep(trickle)
+        else:
+            sock.sendall(data)
+        response = http.client.HTTPResponse(sock)
+        response.begin()
+        content = response.read().decode('utf-8', 'replace')
+    finally:
+        sock.close()
+
+    for header in response.headers.get_all('Set-Cookie') or []:
+        name, _, rest = header.partition('=')
+        cookies[name.strip()] = rest.split(';', 1)[0]
+    return response.status, content
+
+
+def login(base, username, password):
+    """Return (cookies, exam id) of a logged-in student, or None when they have no exam to take."""
+    cookies = {}
+    status, content = request(base, 'GET', '/login/', cookies)
+    token = CSRF_FIELD.search(content)
+    if status != 200 or not token:
+        raise SystemExit(f'Could not load the login page: HTTP {status}')
+    request(base, 'POST', '/login/', cookies,
+            {'csrfmiddlewaretoken': token.group(1), 'username': username, 'password': password})
+    if 'sessionid' not in cookies:
+        raise SystemExit(f'Could not log in as {username}')
+    status, content = request(base, 'GET', '/student/homepage/', cookies)
+    exam = EXAM_LINK.search(content)
+    return (cookies, int(exam.group(1))) if exam else None
+
+
+def submit(base, path, cookies, trickle):
+    status, content = request(base, 'GET', path, cookies)
+    token, forms = CSRF_FIELD.search(content), TOTAL_FORMS.search(content)
+    if status != 200 or not token or not forms:
+        return status
+    fields = {'csrfmiddlewaretoken': token.group(1), 'form-TOTAL_FORMS': forms.group(1), 'form-INITIAL_FORMS': 0}
+    fields.update({f'form-{i}-answer': 'A' for i in range(int(forms.group(1)))})
+    status, content = request(base, 'POST', path, cookies, fields, trickle)
+    return status
+
+
+def run(base, sessions, variant, mode, requests_per_client, trickle):
+    """Run every client in its own thread; returns ([seconds], {status: count}, wall seconds)."""
+    timings, statuses, lock = [], {}, threading.Lock()
+    barrier = threading.Barrier(len(sessions) + 1)
+
+    def client(cookies, exam_id):
+        path = VARIANT_PATHS[variant].format(exam_id)
+        barrier.wait()
+        for _ in range(1 if mode == 'submit' else requests_per_client):
+            start = time.perf_counter()
+            try:
+                if mode == 'submit':
+                    status = submit(base, path, cookies, trickle)
+                else:
+                    status, content = request(base, 'GET', path, cookies, trickle=trickle)
+            except OSError as e:
+                status = type(e).__name__
+            with lock:
+                timings.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    threads = [threading.Thread(target=client, args=session) for session in sessions]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return timings, statuses, time.perf_counter() - start
+
+
+def percentile(values, share):
+    return sorted(values)[min(len(values) - 1, int(len(values) * share))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--users', default='seed_student_{}', help='Username pattern of the seeded students')
+    parser.add_argument('--first', type=int, default=0, help='Number of the first student used')
+    parser.add_argument('--clients', type=int, default=50, help='Concurrent students')
+    parser.add_argument('--password', default='password')
+    parser.add_argument('--variant', nargs='+', choices=sorted(VARIANT_PATHS), default=['sync', 'async'])
+    parser.add_argument('--mode', choices=['load', 'submit'], default='load')
+    parser.add_argument('--requests', type=int, default=20, help='Exam loads per client in load mode')
+    parser.add_argument('--trickle-ms', type=float, default=0, help='Pause between request chunks')
+    args = parser.parse_args()
+
+    base = urlsplit(args.base_url)
+    number = args.first
+    for variant in args.variant:
+        # Submitting is once per student, so every variant gets fresh students in submit mode.
+        if args.mode == 'submit' or variant == args.variant[0]:
+            sessions = []
+            while len(sessions) < args.clients:
+                session = login(base, args.users.format(number), args.password)
+                number += 1
+                if session:
+                    sessions.append(session)
+
+        timings, statuses, elapsed = run(base, sessions, variant, args.mode, args.requests,
+                                         args.trickle_ms / 1000)
+        print(f'{variant}: {len(timings)} {args.mode} requests from {len(sessions)} clients in {elapsed:.2f}s, '
+              f'{len(timings) / elapsed:.1f} req/s; latency median {statistics.median(timings) * 1000:.0f}ms, '
+              f'p95 {percentile(timings, 0.95) * 1000:.0f}ms, p99 {percentile(timings, 0.99) * 1000:.0f}ms; '
+              f'status {statuses}')
+
+
+if __name__ == '__main__':
+    main()